@@ -3,71 +3,130 @@
 # Date: 3/4/2021
 # Version: 2.2
 
-import pygame, math, random
+import pygame, math, random, argparse, functools, struct, numpy
 import gamesetup as gs
+import physics
 from pygame.locals import *
 
+SKY = (0,0,70)
+COLORS = {"red":(255,0,0), "green":(0,255,0), "blue":(0,0,255), "yellow":(255,201,14), "pink":(255,0,255)}
+
+# telemetry growth allowed before warning about a leak (see gs.Telemetry)
+GROWTH = {"memory":16000000, "Particle":500, "Rocket":20, "AfterEvent":100, "afterEvents":100,
+    "bindings":20, "particles":500, "positions":5000, "store":500}
+
+# seconds of trail drawn behind particles when trails are not persistent
+TRAIL = 0.5
+
+# shortest and longest burst heights for launch commands
+LENGTHS = (100, 500)
+
+# snapshot format (see Fireworks.snapshot)
+# header: magic, version, show time, time scale, store time, environment
+# (gravity, wind x, wind y, gust, drag, spread) and how many rockets,
+# particles, timers, store slots and trail positions follow
+SNAPSHOT_MAGIC = b"FWSN"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sH9dHIIII")
+EMITTER_RECORD = numpy.dtype([("active","u1"), ("remaining","<f4"), ("owed","<f4")])
+ROCKET_RECORD = numpy.dtype([("state","u1"), ("clock","<f8"), ("running","u1"), ("max","<f4"), ("length","<f4"),
+    ("pos","<f8",2), ("burst","u1",3), ("layer","<u2"), ("emitters",EMITTER_RECORD,3)])
+PARTICLE_RECORD = numpy.dtype([("moving","u1"), ("clock","<f4"), ("running","u1"), ("pos","<f8",2),
+    ("drawn","<f8",2), ("origin","<f8",2), ("power","u1"), ("slot","<i4"), ("glitter","u1",10), ("history","<u2")])
+TIMER_RECORD = numpy.dtype([("kind","u1"), ("index","<i2"), ("color","<i1"), ("length","<f4"), ("remaining","<f8")])
+SLOT_RECORD = numpy.dtype([("slot","<u4"), ("pos","<f8",2), ("vel","<f8",2), ("gravity","<f8"),
+    ("age","<f4"), ("life","<f4"), ("ramp","<i2")])
+TRAIL_RECORD = numpy.dtype([("pos","<f4",2), ("clock","<f4")])
+
+# timer kinds in snapshots
+RESTORE, LAUNCH, FINALE = range(3)
+
 class Rocket(gs.Sprite):
     '''represents a rocket'''
 
+    __slots__ = ("color", "launched", "exploded", "restoring", "clock", "length", "originPos", "particles",
+        "sparks", "smoke", "crackle")
+
     def __init__(self, game, color, pos):
         '''Rocket(game, color, pos) -> Rocket
         constructs a rocket with color
         lanuches from pos'''
-        gs.Sprite.__init__(self, game, pygame.image.load(f"rocket_{color}.png"))
+        gs.Sprite.__init__(self, game, game.load_image(f"rocket_{color}.png"))
         self.game = game
         self.color = color
         self.pos(pos)
-        self.tilt(-90)
-        self.heading(90)
+        self.origin, self.image = game.cached(f"rocket_{color}", self.turn_up)
+        self.head = math.radians(90)
         self.launched = False
         self.exploded = False
         self.restoring = False
         self.clock = gs.Clock(0.5)
         self.length = random.randrange(300,400)
         self.originPos = pos
-
-        # color dictionary
-        colors = {"red":(255,0,0), "green":(0,255,0), "blue":(0,0,255), "yellow":(255,201,14), "pink":(255,0,255)}
-        self.color = colors[color]
+        self.color = COLORS[color]
 
         # particles for explosion
         self.particles = []
         for i in range(50):
-            particle = Particle(game, colors[color], (self.pos()[0], 520-self.length))
-            self.particles.append(particle)
-            self.game.add_particle(particle)
+            self.particles.append(Particle(game, self.color, (self.pos()[0], 520-self.length)))
+        self.game.add_layer(self, self.particles)
+
+        # sparks and smoke behind the rocket, crackle after the burst
+        store = game.get_store()
+        self.sparks = physics.Emitter(store, 120, 0.35, 0.3, [(255,240,200), self.color, SKY], speed=80)
+        self.smoke = physics.Emitter(store, 30, 1.2, 0.8, [(110,110,130), (60,60,100), SKY],
+            speed=20, gravity=-15, size=2)
+        self.crackle = physics.Emitter(store, 200, 0.3, math.pi, [(255,255,255), self.color, SKY], 0, 70)
+
+    def get_tail(self):
+        '''Rocket.get_tail() -> (x, y)
+        returns the position of the bottom of the rocket'''
+        return self.pos()[0], self.pos()[1]+self.image.get_height()/2
+
+    def turn_up(self):
+        '''Rocket.turn_up() -> (Surface, Surface)
+        tilts the image and points it up
+        returns the tilted and pointed images'''
+        self.tilt(-90)
+        self.heading(90)
+        return self.origin, self.image
 
-    def launch(self):
-        '''Rocket.launch() -> None
-        launches the rocket'''
+    def launch(self, color=None, length=None):
+        '''Rocket.launch(color=None, length=None) -> None
+        launches the rocket
+        color is the name of the burst color and length is the
+        burst height, both are the rocket's own if not given'''
         if not self.launched:
+            if color != None:
+                for particle in self.particles:
+                    particle.color = COLORS[color]
+            if length != None:
+                self.length = length
             self.launched = True
             self.clock.start()
+            self.sparks.start()
+            self.smoke.start()
 
-            # move rocket to end of list
-            rockets = self.game.get_rockets()
-            rockets.remove(self)
-            rockets.append(self)
-
-            # move particles to end of list
-            particles = self.game.get_particles()
-            for particle in self.particles:
-                particles.remove(particle)
-                particles.append(particle)
+            # draw rocket and particles on top
+            self.game.raise_layer(self)
 
-    def update(self):
-        '''Rocket.update() -> None
-        updates the rocket'''
+    def step(self, seconds):
+        '''Rocket.step(seconds) -> None
+        moves the rocket and explodes or restores it when it is time
+        seconds is the time since the last step, for the emitters'''
         if self.launched and not self.restoring:
             self.pos((self.pos()[0], 520-self.length*self.clock.get_time()/self.clock.get_max()))
 
             # explode rocket
             if self.clock.get_time() == self.clock.get_max() and not self.exploded:
                 self.exploded = True
+                self.sparks.stop()
+                self.smoke.stop()
+                self.crackle.start(0.8)
+                gravity = self.game.get_store().get_environment().burst_gravity()
                 for particle in self.particles:
                     particle.set_pos(self.pos())
-                    particle.go()
+                    particle.go(gravity)
                 
                 # reset rocket
                 self.game.after(2000, self.restore)
@@ -80,7 +139,15 @@ class Rocket(gs.Sprite):
                 self.launched = False
                 self.clock.set_max(0.5)
                 self.clock.reset()
-                
+                self.smoke.stop()
+
+        self.sparks.step(seconds, self.get_tail())
+        self.smoke.step(seconds, self.get_tail())
+        self.crackle.step(seconds, self.pos())
+
+    def update(self):
+        '''Rocket.update() -> None
+        updates the rocket'''
         if not self.exploded: gs.Sprite.update(self)
 
     def restore(self):
@@ -93,13 +160,18 @@ class Rocket(gs.Sprite):
         self.clock.reset()
         self.clock.set_max(0.5)
         self.clock.start()
+        self.smoke.start()
 
         for particle in self.particles:
+            particle.color = self.color
             particle.reset()
 
 class Particle:
     '''represents a particle in an explosion'''
 
+    __slots__ = ("moving", "max", "moveClock", "pos", "drawn", "positions", "originPos", "power", "speed",
+        "color", "game", "glitter", "slot")
+
     def __init__(self, game, color, pos):
         '''Particle(game, color, pos) -> Particle
         constructs a particle for explosion'''
@@ -107,6 +179,7 @@ class Particle:
         self.max = 1.5
         self.moveClock = gs.Clock(self.max)
         self.pos = pos
+        self.drawn = pos
         self.positions = []
         self.originPos = pos
         self.power = random.randint(24,26)
@@ -114,25 +187,32 @@ class Particle:
         self.color = color
         self.game = game
         self.glitter = [random.randrange(0,100) for i in range(10)]
+        self.slot = None
 
     def set_pos(self, pos):
         '''Particle.set_pos(pos) -> None
         sets the position of the particle'''
         self.pos = pos
+        self.drawn = pos
         self.originPos = pos
         
-    def go(self):
-        '''Particle.go() -> None
-        start the particle's movement'''
-        self.originHead = math.radians(random.randrange(0,360))
+    def go(self, gravity):
+        '''Particle.go(gravity) -> None
+        start the particle's movement
+        gravity is the gravity of the burst in pixels/s/s'''
+        heading = math.radians(random.randrange(0,360))
+        velocity = physics.velocity(self.power*self.speed, heading)
+        self.slot = self.game.get_store().spawn(self.pos, velocity, gravity)
         self.moving = True
         self.moveClock.start()
 
-        # direction: left or right
-        self.factor = 1
-        if self.originHead > 90:
-            self.originHead = 180-self.originHead
-            self.factor = -1
+    def stop(self):
+        '''Particle.stop() -> None
+        stops the particle's movement'''
+        self.moving = False
+        if self.slot != None:
+            self.game.get_store().kill(self.slot)
+            self.slot = None
 
     def fade(self, color):
         '''Particle.fade(color) -> rgb
@@ -143,6 +223,25 @@ class Particle:
           color[1]-color[1]*time/(self.max-sub),
           color[2]-(color[2]-70)*time/(self.max-sub))
 
+    def step(self):
+        '''Particle.step() -> None
+        moves the particle'''
+        if not self.moving:
+            return
+
+        # add position to position list when the particle has moved on
+        # positions older than the trail are never drawn again
+        clock = self.moveClock.get_time()
+        if self.game.get_trails() == None and (len(self.positions) == 0 or clock > self.positions[0][1]):
+            self.positions.insert(0, (self.pos, clock))
+            while clock-self.positions[-1][1] >= TRAIL:
+                self.positions.pop()
+        self.pos = self.game.get_store().get_pos(self.slot)
+
+        # end
+        if clock == self.max:
+            self.stop()
+
     def update(self):
         '''Particle.update() -> None
         updates the particle'''
@@ -152,83 +251,171 @@ class Particle:
         clock = self.moveClock.get_time()
         color = self.fade(self.color)
         glitter = self.fade((255,255,255))
-                 
-        # add position to position list
+
+        # persistent trails: only draw the newest segment
+        trails = self.game.get_trails()
+        if trails != None:
+            lineColor = color
+            if random.randrange(0,10) == 0:
+                lineColor = glitter
+            pygame.draw.line(trails, lineColor, self.drawn, self.pos, 5)
+            pygame.draw.circle(trails, color, self.pos, 5)
+            self.drawn = self.pos
+            return
+
+        backend = self.game.get_backend()
+        backend.circle(color, self.pos, 5)
         if len(self.positions) == 0:
-            self.positions.append((self.pos, clock))
-        else:
-            self.positions.insert(0, (self.pos, clock))
-            
-        self.pos = self.parametric_x(clock*self.speed), self.parametric_y(clock*self.speed)
-        pygame.draw.circle(self.game.get_screen(), color, self.pos, 5)
+            return
 
         # trail for firework
         last = self.positions[0][0]
-        for pos in self.positions:
-            if clock-pos[1] < 0.5 and pos != last:
+        for index, pos in enumerate(self.positions):
+            if clock-pos[1] < TRAIL and pos != last:
                 lineColor = color
-                if self.positions.index(pos) in self.glitter:
+                if index in self.glitter:
                     lineColor = glitter
-                pygame.draw.line(self.game.get_screen(), lineColor, last, pos[0], 5)
+                backend.line(lineColor, last, pos[0], 5)
                 last = pos[0]
-
-        # end
-        if clock == self.max:
-            self.moving = False
                  
-    def parametric_x(self, t):
-        '''Particle.parametric_x(t) -> float
-        returns the x coordinate for time'''
-        return self.originPos[0]+self.factor*(self.power*math.cos(self.originHead))*t
-
-    def parametric_y(self, t):
-        '''Particle.parametric_y(t) -> float
-        returns the y coordinate for time'''
-        return self.originPos[1]-((self.power*math.sin(self.originHead))*t-9.81*t**2/2)
+    def get_motion(self):
+        '''Particle.get_motion() -> tuple
+        returns (pos, vel, gravity) of the moving particle'''
+        return self.game.get_store().get_state(self.slot)
+
+    def resume(self, motion, elapsed):
+        '''Particle.resume(motion, elapsed) -> None
+        starts the particle elapsed seconds into its movement
+        motion is from Particle.get_motion()'''
+        self.set_pos(motion[0])
+        self.slot = self.game.get_store().spawn(*motion)
+        self.moving = True
+        self.moveClock.set_time(elapsed)
+        self.moveClock.start()
 
     def reset(self):
         '''Particle.reset() -> None
         resets the particle'''
+        self.stop()
         self.__init__(self.game, self.color, self.originPos)
         
 class Fireworks(gs.Game):
     '''represents the window for fireworks'''
 
-    def __init__(self):
-        '''Fireworks() -> Fireworks
-        constructs the fireworks'''
-        gs.Game.__init__(self)
+    def __init__(self, size=(600,625), tubes=None, backend=None, bloom=False, persistent=False, environment=None,
+        remake=None):
+        '''Fireworks(size=(600,625), tubes=None, backend=None, bloom=False, persistent=False, environment=None,
+        remake=None) -> Fireworks
+        constructs the fireworks
+        tubes is a list of (color, x) for each launch tube
+        backend is the render backend name (see gs.Game.set_mode)
+        bloom adds glow to the particles (software backend only)
+        persistent draws trails on a surface that fades to the sky
+        instead of keeping the past positions of every particle
+        environment is the physics.Environment, still air if not given
+        remake constructs the fireworks again on cold restarts (see gs.Game)
+        by default they are made again with the same arguments'''
+        if remake == None:
+            remake = functools.partial(Fireworks.__init__, self, size, tubes, backend, bloom, persistent, environment)
+        gs.Game.__init__(self, remake)
+        if environment == None:
+            environment = physics.Environment()
+        self.store = physics.ParticleStore(environment)
 
         # set up screen
-        pygame.display.set_caption("Fireworks")
-        self.screen = pygame.display.set_mode((600,625))
+        self.set_mode(size, "Fireworks", backend)
+        self.bloom = None
+        if bloom and self.get_screen() != None:
+            self.bloom = gs.Bloom(size)
+
+        # persistent trails
+        self.trails = None
+        if persistent:
+            self.trails = pygame.Surface(size)
+            self.sky = pygame.Surface(size)
+            self.sky.fill(SKY)
+            self.dimmer = pygame.Surface(size)
+            self.trailClock = gs.Clock()
+
+        self.size = size
+        self.tubes = tubes
+        self.loading = False
+        self.setup()
+
+    def setup(self):
+        '''Fireworks.setup() -> None
+        sets up the rockets, buttons and bindings'''
+        self.store.clear()
+        self.showTime = 0
+
+        # a new show makes the recorded one stale, unless a snapshot is being loaded
+        if self.recorder != None and not self.loading:
+            self.recorder.discard_after(0)
+        if self.trails != None:
+            self.trails.fill(SKY)
+            self.trailClock.reset()
+            self.trailClock.start()
 
         # rockets and buttons
+        # layers are drawn in order, loose particles first
         self.particles = []
+        self.layers = {None: self.particles}
         self.rockets = []
         self.buttons = []
-        rockets = [("red", 100), ("green", 200), ("blue", 300), ("pink", 400), ("yellow", 500)]
-        for rocket in rockets:
+        tubes = self.tubes
+        if tubes == None:
+            tubes = [("red", 100), ("green", 200), ("blue", 300), ("pink", 400), ("yellow", 500)]
+        for rocket in tubes:
             newRocket = Rocket(self, rocket[0], (rocket[1], 520))
             self.rockets.append(newRocket)
-            self.buttons.append(gs.Button(self, pygame.image.load("launch_button.png"), pos=(rocket[1],570),
-                hover=pygame.image.load("launch_button_hover.png"), command=newRocket.launch))
+            self.buttons.append(gs.Button(self, self.load_image("launch_button.png"), pos=(rocket[1],570),
+                hover=self.load_image("launch_button_hover.png"), command=newRocket.launch))
 
         # finale button
-        self.buttons.append(gs.Button(self, pygame.image.load("finale_button.png"), pos=(300, 605),
-            hover=pygame.image.load("finale_button_hover.png"), command=self.launch_all))
+        self.buttons.append(gs.Button(self, self.load_image("finale_button.png"), pos=(self.size[0]/2, 605),
+            hover=self.load_image("finale_button_hover.png"), command=self.launch_all))
         
         self.bind(KEYDOWN, self.launch_all, "finale")
 
+        # control server commands
+        self.on_command("launch", lambda command: self.launch_tube(command["tube"],
+            command.get("color"), command.get("length")))
+        self.on_command("finale", lambda command: self.launch_all())
+        self.on_command("schedule", self.schedule)
+        # only warm restarts from the control server, a cold one reopens the window
+        self.on_command("restart", lambda command: self.restart())
+        self.on_command("time_scale", lambda command: self.set_time_scale(float(command["scale"])))
+        self.on_command("environment", lambda command: self.store.get_environment().configure(**command["settings"]))
+        self.on_command("seek", self.seek)
+
     def get_rockets(self):
         '''Fireworks.get_rockets() -> None
         returns all rockets'''
         return self.rockets
 
+    def get_store(self):
+        '''Fireworks.get_store() -> physics.ParticleStore
+        returns the store moving every particle'''
+        return self.store
+
+    def monitor(self, file, interval=5, thresholds=None):
+        '''Fireworks.monitor(file, interval=5, thresholds=None) -> gs.Telemetry
+        starts sampling telemetry into file, watching the particles too
+        thresholds default to GROWTH'''
+        if thresholds == None:
+            thresholds = GROWTH
+        telemetry = gs.Game.monitor(self, file, interval, thresholds)
+        telemetry.watch_class(Particle)
+        telemetry.watch_class(Rocket)
+        telemetry.watch("particles", lambda: len(self.get_particles()))
+        telemetry.watch("positions", lambda: sum(len(particle.positions) for particle in self.get_particles()))
+        telemetry.watch("store", self.store.get_count)
+        return telemetry
+
     def get_particles(self):
         '''Fireworks.get_particles() -> list
-        returns all partcles'''
-        return self.particles
+        returns all partcles in drawing order'''
+        return [particle for layer in self.layers.values() for particle in layer]
 
     def launch_all(self, event=None):
         '''Fireworks.launch_all() -> None
@@ -237,23 +424,315 @@ class Fireworks(gs.Game):
             for rocket in self.rockets[:]:
                 rocket.launch()
 
+    def get_trails(self):
+        '''Fireworks.get_trails() -> Surface
+        returns the persistent trail surface
+        returns None if trails are not persistent'''
+        return self.trails
+
+    def fade_trails(self, halfLife=0.1):
+        '''Fireworks.fade_trails(halfLife=0.1) -> None
+        fades the persistent trails towards the sky
+        trails lose half their brightness every halfLife seconds'''
+        factor = int(256*0.5**(self.trailClock.get_time()/halfLife))
+        if factor > 240:
+            return
+        self.trailClock.reset()
+        self.trailClock.start()
+
+        # sky is taken out so the multiply fades towards it
+        # blended blits are much faster than blended fills
+        self.dimmer.fill((factor,factor,factor))
+        self.trails.blit(self.sky, (0,0), special_flags=BLEND_RGB_SUB)
+        self.trails.blit(self.dimmer, (0,0), special_flags=BLEND_RGB_MULT)
+        self.trails.blit(self.sky, (0,0), special_flags=BLEND_RGB_ADD)
+
+    def check_tube(self, tube):
+        '''Fireworks.check_tube(tube) -> int
+        returns tube if it is the index of a rocket
+        raises ValueError otherwise'''
+        if type(tube) != int or not 0 <= tube < len(self.rockets):
+            raise ValueError(f"no tube {tube!r}")
+        return tube
+
+    def check_length(self, length):
+        '''Fireworks.check_length(length) -> float
+        returns length as a burst height within LENGTHS
+        None stays None, raises ValueError if length is not a number'''
+        if length == None:
+            return None
+        length = float(length)
+        if not math.isfinite(length):
+            raise ValueError(f"bad length {length}")
+        return min(max(length, LENGTHS[0]), LENGTHS[1])
+
+    def launch_tube(self, tube, color=None, length=None):
+        '''Fireworks.launch_tube(tube, color=None, length=None) -> None
+        launches the rocket in tube, counting from the left
+        see Rocket.launch for color and length'''
+        self.rockets[self.check_tube(tube)].launch(color, self.check_length(length))
+
+    def schedule(self, command):
+        '''Fireworks.schedule(command) -> None
+        schedules the launches in command["launches"]
+        each launch is {"after": seconds, "tube": tube}
+        and may have a "color" and "length" (see Rocket.launch)
+        launches without a tube are finales
+        nothing is scheduled if any launch is bad'''
+        launches = command["launches"]
+        if not isinstance(launches, list):
+            raise ValueError("launches must be a list")
+
+        timers = []
+        for launch in launches:
+            if not isinstance(launch, dict):
+                raise ValueError(f"bad launch {launch!r}")
+            delay = float(launch["after"])
+            if not math.isfinite(delay) or delay < 0:
+                raise ValueError(f"bad launch time {launch['after']!r}")
+            if "tube" in launch:
+                if launch.get("color", "red") not in COLORS:
+                    raise ValueError(f"unknown color {launch['color']}")
+                timers.append((delay, functools.partial(self.launch_tube, self.check_tube(launch["tube"]),
+                    launch.get("color"), self.check_length(launch.get("length")))))
+            else:
+                timers.append((delay, self.launch_all))
+
+        for delay, launch in timers:
+            self.after(delay*1000, launch)
+
     def add_particle(self, particle):
         '''Firework.add_particle(particle) -> None
         adds particles to be updated before rockets'''
         self.particles.append(particle)
 
+    def add_layer(self, rocket, particles):
+        '''Fireworks.add_layer(rocket, particles) -> None
+        adds a layer of particles owned by rocket
+        layers are drawn in order of launch'''
+        self.layers[rocket] = particles
+
+    def raise_layer(self, rocket):
+        '''Fireworks.raise_layer(rocket) -> None
+        moves the layer of rocket to the top'''
+        self.layers[rocket] = self.layers.pop(rocket)
+
+    def step(self, seconds):
+        '''Fireworks.step(seconds) -> None
+        moves the particles and rockets'''
+        self.showTime += seconds
+        self.store.step(seconds)
+        for layer in self.layers.values():
+            for particle in layer: particle.step()
+        for rocket in self.rockets: rocket.step(seconds)
+
+    def get_elapsed(self):
+        '''Fireworks.get_elapsed() -> float
+        returns the seconds of simulation since the show was set up
+        snapshots are named by this time'''
+        return self.showTime
+
+    def seek(self, command):
+        '''Fireworks.seek(command) -> None
+        goes to show time command["time"] from the recorded snapshots'''
+        if self.recorder != None:
+            self.resume(self.recorder.get_directory(), float(command["time"]))
+
+    def get_timer_record(self, event, rockets):
+        '''Fireworks.get_timer_record(event, rockets) -> tuple
+        returns the TIMER_RECORD of an after event
+        returns None for timers that cannot be saved
+        rockets maps every rocket to its index'''
+        command = event.command
+        remaining = event.due-self.timerClock.get_time()
+        if getattr(command, "__func__", None) is Rocket.restore and command.__self__ in rockets:
+            return RESTORE, rockets[command.__self__], -1, numpy.nan, remaining
+        if isinstance(command, functools.partial) and command.func == self.launch_tube:
+            tube, color, length = command.args
+            color = -1 if color == None else list(COLORS).index(color)
+            return LAUNCH, tube, color, numpy.nan if length == None else length, remaining
+        if command == self.launch_all:
+            return FINALE, -1, -1, numpy.nan, remaining
+        return None
+
+    def snapshot(self):
+        '''Fireworks.snapshot() -> (float, bytes)
+        returns the show time and the state of the show
+        clocks and timers are saved relative to the show, loose
+        particles, other timers and persistent trails are not saved'''
+        rocketIndex = {rocket:i for i, rocket in enumerate(self.rockets)}
+        layers = {rocket:i for i, rocket in enumerate(self.layers) if rocket != None}
+        rockets = numpy.zeros(len(self.rockets), ROCKET_RECORD)
+        particles = []
+        trails = []
+        for i, rocket in enumerate(self.rockets):
+            clock, running = rocket.clock.get_state()
+            emitters = []
+            for emitter in (rocket.sparks, rocket.smoke, rocket.crackle):
+                active, remaining, owed = emitter.get_state()
+                emitters.append((active, numpy.nan if remaining == None else remaining, owed))
+            rockets[i] = (rocket.launched | rocket.exploded << 1 | rocket.restoring << 2, clock, running,
+                rocket.clock.get_max(), rocket.length, rocket.pos(), rocket.particles[0].color,
+                layers[rocket], emitters)
+
+            for particle in rocket.particles:
+                clock, running = particle.moveClock.get_state()
+                particles.append((particle.moving, clock, running, particle.pos, particle.drawn, particle.originPos,
+                    particle.power, -1 if particle.slot == None else particle.slot, particle.glitter,
+                    len(particle.positions)))
+                trails.extend(particle.positions)
+
+        particles = numpy.array(particles, PARTICLE_RECORD)
+        trails = numpy.array(trails, TRAIL_RECORD)
+        timers = [self.get_timer_record(event, rocketIndex) for event in self.timers.values()]
+        timers = numpy.array([timer for timer in timers if timer != None], TIMER_RECORD)
+        live = self.store.get_live()
+        slots = numpy.zeros(len(live[0]), SLOT_RECORD)
+        for field, values in zip(SLOT_RECORD.names, live):
+            slots[field] = values
+
+        environment = self.store.get_environment()
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.showTime, self.get_time_scale(),
+            self.store.time, environment.gravity, environment.wind[0], environment.wind[1], environment.gust,
+            environment.drag, environment.spread, len(rockets), len(particles), len(timers), len(slots), len(trails))
+        return self.showTime, b"".join((header, rockets.tobytes(), particles.tobytes(), timers.tobytes(),
+            slots.tobytes(), trails.tobytes()))
+
+    def load_snapshot(self, data):
+        '''Fireworks.load_snapshot(data) -> float
+        sets up the show as it was in data from Fireworks.snapshot()
+        returns the show time of the snapshot'''
+        header = SNAPSHOT_HEADER.unpack_from(data)
+        if header[0] != SNAPSHOT_MAGIC:
+            raise ValueError("not a fireworks snapshot")
+        if header[1] != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {header[1]}")
+        showTime, scale, storeTime = header[2:5]
+        gravity, windX, windY, gust, drag, spread = header[5:11]
+        counts = header[11:]
+
+        # the records follow the header in order
+        records = []
+        offset = SNAPSHOT_HEADER.size
+        for record, count in zip((ROCKET_RECORD, PARTICLE_RECORD, TIMER_RECORD, SLOT_RECORD, TRAIL_RECORD), counts):
+            records.append(numpy.frombuffer(data, record, count, offset))
+            offset += record.itemsize*count
+        rockets, particles, timers, slots, trails = records
+        if len(rockets) != len(self.rockets) or len(particles) != sum(len(rocket.particles) for rocket in self.rockets):
+            raise ValueError("snapshot is of a show with other tubes")
+
+        self.loading = True
+        try:
+            self.reset()
+        finally:
+            self.loading = False
+        self.showTime = showTime
+        self.set_time_scale(scale)
+        self.store.get_environment().configure(gravity=gravity, wind=(windX, windY), gust=gust, drag=drag,
+            spread=spread)
+        self.store.set_live(*(slots[field] for field in SLOT_RECORD.names))
+        self.store.time = storeTime
+
+        # records are read a field at a time, so values come back as python values
+        rockets = zip(*(rockets[field].tolist() for field in ROCKET_RECORD.names))
+        particleRecords = zip(*(particles[field].tolist() for field in PARTICLE_RECORD.names))
+        trails = list(zip(map(tuple, trails["pos"].tolist()), trails["clock"].tolist()))
+        first = 0
+        for rocket, record in zip(self.rockets, rockets):
+            state, clock, running, maxTime, length, pos, burst, layer, emitters = record
+            rocket.launched, rocket.exploded, rocket.restoring = bool(state & 1), bool(state & 2), bool(state & 4)
+            rocket.clock.set_max(maxTime)
+            rocket.clock.set_state((clock, running))
+            rocket.length = length
+            rocket.pos(tuple(pos))
+            for emitter, (active, remaining, owed) in zip((rocket.sparks, rocket.smoke, rocket.crackle), emitters):
+                emitter.set_state((bool(active), None if math.isnan(remaining) else remaining, owed))
+
+            for particle in rocket.particles:
+                moving, clock, running, pos, drawn, origin, power, slot, glitter, history = next(particleRecords)
+                particle.moving = bool(moving)
+                particle.moveClock.set_state((clock, running))
+                particle.pos, particle.drawn, particle.originPos = tuple(pos), tuple(drawn), tuple(origin)
+                particle.power = power
+                particle.slot = None if slot == -1 else slot
+                particle.glitter = glitter
+                particle.color = tuple(burst)
+                particle.positions = trails[first:first+history]
+                first += history
+
+        # layers in the order they were drawn
+        for layer, rocket in sorted(zip(records[0]["layer"].tolist(), self.rockets)):
+            self.raise_layer(rocket)
+
+        colors = list(COLORS)
+        for kind, index, color, length, remaining in timers.tolist():
+            if kind == RESTORE:
+                command = self.rockets[index].restore
+            elif kind == LAUNCH:
+                command = functools.partial(self.launch_tube, index, None if color == -1 else colors[color],
+                    None if math.isnan(length) else length)
+            else:
+                command = self.launch_all
+            self.after(remaining*1000, command)
+        return showTime
+
     def update(self):
         '''Fireworks.update() -> None
         updates the fireworks'''
-        self.screen.fill((0,0,70))
+        backend = self.get_backend()
+        if self.trails == None:
+            backend.fill(SKY)
+        else:
+            self.fade_trails()
 
         # update particles buttons and rockets
-        for particle in self.particles: particle.update()
-        for rocket in self.rockets: rocket.update()
+        for layer in self.layers.values():
+            for particle in layer: particle.update()
+        if self.trails != None: backend.blit(self.trails, (0,0), True)
+        for pos, color, size in self.store.get_emitted():
+            backend.circle(color, pos, size)
+        if self.bloom != None: self.bloom.apply(self.screen)
+        for rocket in self.layers:
+            if rocket != None: rocket.update()
+        # the sky or trails cover the whole screen, so buttons are always drawn
         for button in self.buttons: button.update()
             
-        pygame.display.update()
-
-pygame.init()
-Fireworks().mainloop()
+        backend.present()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fireworks")
+    parser.add_argument("--backend", choices=list(gs.BACKENDS), help="render backend")
+    parser.add_argument("--bloom", action="store_true", help="add glow to the particles")
+    parser.add_argument("--persistent", action="store_true", help="draw trails on a fading surface")
+    parser.add_argument("--port", type=int, help="accept control commands on this localhost port")
+    parser.add_argument("--socket", help="accept control commands on this unix socket")
+    parser.add_argument("--wind", type=float, default=0, help="sideways wind in pixels/s")
+    parser.add_argument("--gust", type=float, default=0, help="how much the wind changes in pixels/s")
+    parser.add_argument("--drag", type=float, default=0, help="air drag coefficient")
+    parser.add_argument("--telemetry", help="write memory and object counts to this file")
+    parser.add_argument("--stream", choices=list(gs.SINKS), help="publish the frames for preview monitors")
+    parser.add_argument("--stream-port", type=int, default=8080, help="port of the mjpeg stream")
+    parser.add_argument("--snapshots", help="save snapshots of the show in this directory")
+    parser.add_argument("--resume", action="store_true", help="carry on from the newest snapshot")
+    parser.add_argument("--seek", type=float, help="start the show at this many seconds from the snapshots")
+    args = parser.parse_args()
+
+    pygame.init()
+    environment = physics.Environment(wind=(args.wind, 0), gust=args.gust, drag=args.drag, spread=0.1)
+    fireworks = Fireworks(backend=args.backend, bloom=args.bloom, persistent=args.persistent, environment=environment)
+    if args.port != None or args.socket != None:
+        fireworks.serve(args.port, args.socket)
+    if args.telemetry != None:
+        fireworks.monitor(args.telemetry)
+    if args.snapshots != None:
+        recorder = fireworks.record(args.snapshots)
+        if args.resume or args.seek != None:
+            fireworks.resume(args.snapshots, args.seek)
+        else:
+            recorder.discard_after(0)
+    if args.stream == "mjpeg":
+        fireworks.stream("mjpeg", port=args.stream_port)
+    elif args.stream != None:
+        fireworks.stream(args.stream)
+    fireworks.mainloop()
                            
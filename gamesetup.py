@@ -10,12 +10,91 @@
 # It also in a variety of different objects to make
 # coding your game easier in general.
 
-import pygame, time, math, random
+import pygame, time, math, random, os, weakref, asyncio, json, queue, threading, heapq
+import gc, collections, tracemalloc, warnings, io, struct, sys, http.server, zlib, glob
+from multiprocessing import shared_memory, resource_tracker
+
+# numpy is optional, it only speeds up some effects
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class GameSetupError(Exception):
+    '''error raised for misuse of the game setup module'''
+
+class TelemetryWarning(Warning):
+    '''warning raised when telemetry sees something keep growing'''
+
+class Timeline:
+    '''represents the simulation time that every Clock follows
+    simulation time runs at scale times real time, 0 pauses it.
+    while a game is running, the game moves the time forward
+    in steps, otherwise it follows real time on its own'''
+
+    def __init__(self):
+        '''Timeline() -> Timeline
+        constructs the timeline at the current time'''
+        self.time = time.time()
+        self.realTime = self.time
+        self.scale = 1
+        self.driven = False
+
+    def now(self):
+        '''Timeline.now() -> float
+        returns the simulation time in seconds'''
+        if self.driven:
+            return self.time
+        return self.time+(time.time()-self.realTime)*self.scale
+
+    def get_scale(self):
+        '''Timeline.get_scale() -> float
+        returns how fast simulation time runs compared to real time'''
+        return self.scale
+
+    def set_scale(self, scale):
+        '''Timeline.set_scale(scale) -> None
+        sets how fast simulation time runs compared to real time'''
+        if not self.driven:
+            self.time = self.now()
+            self.realTime = time.time()
+        self.scale = scale
+
+    def drive(self):
+        '''Timeline.drive() -> None
+        stops the time from moving on its own
+        use Timeline.tick() and Timeline.advance() to move it'''
+        self.time = self.now()
+        self.realTime = time.time()
+        self.driven = True
+
+    def release(self):
+        '''Timeline.release() -> None
+        lets the time move on its own again'''
+        self.realTime = time.time()
+        self.driven = False
+
+    def tick(self):
+        '''Timeline.tick() -> float
+        returns the simulation time passed since the last tick'''
+        realTime = time.time()
+        elapsed = (realTime-self.realTime)*self.scale
+        self.realTime = realTime
+        return elapsed
+
+    def advance(self, seconds):
+        '''Timeline.advance(seconds) -> None
+        moves the simulation time forward'''
+        self.time += seconds
+
+timeline = Timeline()
 
 class Clock:
     '''represents a stopwatch that keeps track of time in seconds
    the clock starts out paused, so don't forget to play it!'''
 
+    __slots__ = ("startTime", "saved", "maxTime")
+
     def __init__(self, maxTime=None):
         '''Clock() -> Clock
         constructs a clock.
@@ -39,7 +118,7 @@ class Clock:
         '''Clock.get_time() -> float
         returns the current time on the stopwatch'''
         if self.startTime == None: return self.saved
-        currentTime = time.time()-self.startTime+self.saved
+        currentTime = timeline.now()-self.startTime+self.saved
         if self.maxTime != None and currentTime > self.maxTime:
             return self.maxTime
         return currentTime
@@ -68,11 +147,26 @@ class Clock:
         '''Clock.start() -> None
         starts the stopwatch.
         stopwatch may be stopped using Clock.stop()'''
-        self.startTime = time.time()
+        self.startTime = timeline.now()
+
+    def get_state(self):
+        '''Clock.get_state() -> (time, running)
+        returns the time on the stopwatch and whether it is running
+        the time does not depend on when it is read, so it can be saved'''
+        return self.get_time(), self.startTime != None
+
+    def set_state(self, state):
+        '''Clock.set_state(state) -> None
+        sets the stopwatch to state from Clock.get_state()'''
+        self.set_time(state[0])
+        if state[1]:
+            self.start()
 
 class Sprite:
     '''sprite object to inherit from'''
 
+    __slots__ = ("keepImg", "origin", "image", "position", "head", "game")
+
     def __init__(self, game, surface):
         '''Sprite(game, surface) -> Sprite
         constructs an object'''
@@ -152,6 +246,7 @@ class Widget(dict):
         game.add_widget(self, self.id)
         self.game = game
         self.events = {}
+        self.nextEventID = 0
 
     def __eq__(self, other):
         '''Widget == other -> bool
@@ -164,14 +259,10 @@ class Widget(dict):
         return f"<Widget -ID: {self.id} -Rect: {self.rect} -Events: {self.events}>"
 
     def get_clear_ID(self):
-        '''Widget.ID() -> str
-        returns a clear event ID'''
-        i = 0
-        while True:
-            ID = f"generated_event_id_{i}"
-            if ID not in self.events:
-                return ID
-            i += 1
+        '''Widget.get_clear_ID() -> GeneratedID
+        returns an event ID that has never been used by the widget'''
+        self.nextEventID += 1
+        return GeneratedID(self.nextEventID)
             
     def is_over(self, pos):
         '''Widget.is_over(pos) -> bool
@@ -262,7 +353,7 @@ class Widget(dict):
         self.event(event)
 
     def onclick(self, eventId, command=None, num=1):
-        '''Widget.onclick(eventId, command=None, num=None) -> None
+        '''Widget.onclick(eventId, command=None, num=1) -> ID
         sets up an event using eventId. If command=None, removes exisiting event
         eventId is any str or int, num is the mouse button number (1,2, or 3)
         auto generates ID if eventId is None
@@ -270,9 +361,11 @@ class Widget(dict):
         onclick will call command when the mouse button is clicked'''
         if command == None:
             self.remove_event(eventId)
+            return eventId
         if eventId== None:
             eventId = self.get_clear_ID()
         self.events[eventId] = ("onclick", command, num)
+        return eventId
 
     def onrelease(self, eventId, command=None, num=1):
         '''Widget.onrelease(eventId, command=None, num=1) -> ID
@@ -283,6 +376,7 @@ class Widget(dict):
         onrelease will call command when the mouse button is released'''
         if command == None:
             self.remove_event(eventId)
+            return eventId
         if eventId == None:
             eventId = self.get_clear_ID()
         self.events[eventId] = ("onrelease", command, num)
@@ -297,6 +391,7 @@ class Widget(dict):
         onkey will call command everytime key is pressed down'''
         if command == None:
             self.remove_event(eventId)
+            return eventId
         if eventId == None:
             eventId = self.get_clear_ID()
         self.events[eventId] = ("onkey", command, key)
@@ -311,6 +406,7 @@ class Widget(dict):
         onkeyrelease will call command everytime key is released'''
         if command == None:
             self.remove_event(eventId)
+            return eventId
         if eventId == None:
             eventId = self.get_clear_ID()
         self.events[eventId] = ("onkeyrelease", command, key)
@@ -325,6 +421,7 @@ class Widget(dict):
         onkeypress will call command every 50 milliseconds if key is pressed'''
         if command == None:
             self.remove_event(eventId)
+            return eventId
         if eventId == None:
             eventId = self.get_clear_ID()
         self.events[eventId] = ("onkeypress", command, key)
@@ -365,9 +462,12 @@ class Button(Widget):
         Widget.__init__(self, game, rect, defaults, **attributes)
         self.move(self["pos"])
         self.img = img
+        self.rects = {}
+        self.shown = None
         
         # bindings
         self.clicked = False
+        self.hovering = self.is_over(game.get_mouse_pos())
         self.onclick(None, self.perform)
         self.onrelease(None, self.perform)
 
@@ -390,37 +490,56 @@ class Button(Widget):
             self.clicked = False
         elif not self.clicked:
             self.clicked = True
-        
-    def update(self):
-        '''Button.update() -> None
-        updates the button'''
-        img = None
-        
-        # disabled img
+
+    def event(self, event):
+        '''Button.event(event) -> None
+        tracks hovering using mouse motion events'''
+        if event.type == pygame.MOUSEMOTION:
+            self.hovering = self.is_over(event.pos)
+            if self.clicked and self["click"] != None and not self.hovering:
+                self.clicked = False
+
+    def get_img_rect(self, img):
+        '''Button.get_img_rect(img) -> tuple
+        returns the rect of img centered on the button position
+        rects are only computed once per image and position'''
+        key = img, self["pos"]
+        if key not in self.rects:
+            width, height = img.get_size()
+            self.rects[key] = (self["pos"][0]-width/2, self["pos"][1]-height/2, width, height)
+        return self.rects[key]
+
+    def get_look(self):
+        '''Button.get_look() -> Surface/tuple
+        returns the image for the current state of the button'''
         if self["disabled"]:
             if self["disable"] != None:
-                img = self["disable"]
-                
-        # click img
+                return self["disable"]
         elif self.clicked and self["click"] != None:
-            if not self.is_over(pygame.mouse.get_pos()):
-                self.clicked = False
-            else:
-                img = self["click"]
-                
-        # hover img
-        elif self.is_over(pygame.mouse.get_pos()) and self["hover"] != None:
-            img = self["hover"]
-
-        if img == None:
-            img = self.img
+            return self["click"]
+        elif self.hovering and self["hover"] != None:
+            return self["hover"]
+        return self.img
+        
+    def update(self, force=True):
+        '''Button.update(force=True) -> bool
+        updates the button
+        if force is False, only draws when the look of the button changed
+        which only works if the screen under the button is not redrawn.
+        games that clear the whole screen every frame must keep force
+        returns whether the button was drawn'''
+        img = self.get_look()
+        if not force and img is self.shown:
+            return False
+        self.shown = img
 
         if isinstance(img, pygame.Surface):
-            self.set_rect(img.get_rect())
-            self.move(self["pos"])
-            self.game.blit(img, self["pos"], True, True)
+            rect = self.get_img_rect(img)
+            self.set_rect(rect)
+            self.game.get_backend().blit(img, rect[:2])
         else:
             self.set_rect((self["pos"][0], self["pos"][1], self.img[0], self.img[1]))
+        return True
 
 class Popup(Widget):
     '''represents a popup widget'''
@@ -436,7 +555,8 @@ class Popup(Widget):
         self.img = img
         self.buttons = []
         self.isopen = False
-        self.width, self.height = pygame.display.get_window_size()
+        self.shown = False
+        self.width, self.height = game.get_size()
 
     def is_open(self):
         '''Popup.is_open() -> bool
@@ -477,14 +597,19 @@ class Popup(Widget):
         if popup is open, closes popup, else opens popup'''
         self.isopen = not self.isopen
 
-    def update(self):
-        '''Popup.update() -> None
-        updates the popup on the screen'''
+    def update(self, force=True):
+        '''Popup.update(force=True) -> None
+        updates the popup on the screen
+        if force is False, only draws what changed since the last update
+        (see Button.update)'''
+        opened = self.isopen and not self.shown
+        self.shown = self.isopen
         if not self.isopen: return
-        self.game.blit(self.img, (self.width/2, self.height/2), True, True)
+        if force or opened:
+            self.game.blit(self.img, (self.width/2, self.height/2), True, True)
 
         for button in self.buttons:
-            button.update()
+            button.update(force or opened)
         
 class Slider:
     '''a type of "sprite" that moves steadily with a internal clock'''
@@ -542,27 +667,54 @@ class Slider:
         self.moving = False
         self.clock.reset()
 
+class GeneratedID:
+    '''represents an automatically generated binding, timer or event ID
+    it is only equal to itself, so it never collides with IDs chosen by callers'''
+
+    __slots__ = ("number",)
+
+    def __init__(self, number):
+        '''GeneratedID(number) -> GeneratedID
+        constructs the ID, number orders IDs by when they were made'''
+        self.number = number
+
+    def __lt__(self, other):
+        '''GeneratedID < other -> bool
+        returns if self was made before other'''
+        return self.number < other.number
+
+    def __repr__(self):
+        '''repr(GeneratedID) -> str
+        converts the ID to str'''
+        return f"<GeneratedID {self.number}>"
+
 class AfterEvent:
     '''private class for after events'''
 
-    def __init__(self, eventList, ms, command):
-        '''AfterEvent(eventList, ms, command) -> AfterEvent
-        constructs the event object for after'''
-        self.ms = ms
+    __slots__ = ("ID", "due", "command", "completed")
+
+    def __init__(self, ID, due, command):
+        '''AfterEvent(ID, due, command) -> AfterEvent
+        constructs the event object for after
+        due is the time on the game's timer clock'''
+        self.ID = ID
+        self.due = due
         self.command = command
-        self.clock = Clock()
-        self.clock.start()
-        self.eventList = eventList
-        self.eventList.append(self)
         self.completed = False
 
-    def check(self):
-        '''AfterEvent.check() -> None
-        checks if the event is ready'''
-        if self.clock.get_time() > self.ms/1000 and not self.completed:
+    def __lt__(self, other):
+        '''AfterEvent < other -> bool
+        orders events by due time, then by when they were made'''
+        return (self.due, self.ID) < (other.due, other.ID)
+
+    def check(self, now):
+        '''AfterEvent.check(now) -> bool
+        performs the command if the event is due at time now
+        returns whether the event is completed'''
+        if now >= self.due and not self.completed:
             self.command()
-            self.eventList.remove(self)
             self.completed = True
+        return self.completed
 
 class Sound(pygame.mixer.Sound):
     '''represents a sound object to be played, muted, unmuted'''
@@ -591,6 +743,897 @@ class Sound(pygame.mixer.Sound):
         unmutes the sound'''
         pygame.mixer.Sound.set_volume(self, self.originVolume)
         
+class SoftwareBackend:
+    '''draws with pygame.draw and Surface.blit onto the display surface'''
+
+    def __init__(self, size):
+        '''SoftwareBackend(size) -> SoftwareBackend
+        opens the window'''
+        self.screen = pygame.display.set_mode(size)
+
+    def get_screen(self):
+        '''SoftwareBackend.get_screen() -> Surface
+        returns the display surface'''
+        return self.screen
+
+    def get_size(self):
+        '''SoftwareBackend.get_size() -> (width, height)
+        returns the size of the window'''
+        return self.screen.get_size()
+
+    def set_caption(self, caption):
+        '''SoftwareBackend.set_caption(caption) -> None
+        sets the window title'''
+        pygame.display.set_caption(caption)
+
+    def fill(self, color):
+        '''SoftwareBackend.fill(color) -> None
+        fills the window with color'''
+        self.screen.fill(color)
+
+    def circle(self, color, pos, radius):
+        '''SoftwareBackend.circle(color, pos, radius) -> None
+        draws a filled circle'''
+        pygame.draw.circle(self.screen, color, pos, radius)
+
+    def line(self, color, start, end, width=1):
+        '''SoftwareBackend.line(color, start, end, width=1) -> None
+        draws a line'''
+        pygame.draw.line(self.screen, color, start, end, width)
+
+    def blit(self, surface, pos, changed=False):
+        '''SoftwareBackend.blit(surface, pos, changed=False) -> None
+        draws surface with its top-left corner at pos
+        changed is True if surface was drawn on since it was last blitted'''
+        self.screen.blit(surface, pos)
+
+    def present(self):
+        '''SoftwareBackend.present() -> None
+        shows the frame on the window'''
+        pygame.display.update()
+
+class SDL2Backend:
+    '''draws with a pygame._sdl2.video Renderer
+    circles and lines are quads of one shared texture tinted per draw,
+    so SDL can batch them. blitted surfaces are turned into textures
+    once and should not be changed afterwards'''
+
+    def __init__(self, size):
+        '''SDL2Backend(size) -> SDL2Backend
+        opens the window with a hardware renderer if there is one,
+        otherwise with SDL's software renderer'''
+        from pygame._sdl2 import video
+        self.video = video
+        self.size = size
+        self.window = video.Window(size=size)
+        try:
+            self.renderer = video.Renderer(self.window, accelerated=-1)
+        except pygame.error:
+            self.renderer = video.Renderer(self.window, accelerated=0)
+        self.textures = weakref.WeakKeyDictionary()
+        self.circles = {}
+
+        # one white pixel stretched and rotated for lines
+        pixel = pygame.Surface((1,1))
+        pixel.fill((255,255,255))
+        self.pixel = video.Texture.from_surface(self.renderer, pixel)
+
+    def get_screen(self):
+        '''SDL2Backend.get_screen() -> None
+        there is no display surface with a renderer'''
+        return None
+
+    def get_size(self):
+        '''SDL2Backend.get_size() -> (width, height)
+        returns the size of the window'''
+        return self.size
+
+    def set_caption(self, caption):
+        '''SDL2Backend.set_caption(caption) -> None
+        sets the window title'''
+        self.window.title = caption
+
+    def fill(self, color):
+        '''SDL2Backend.fill(color) -> None
+        fills the window with color'''
+        self.renderer.draw_color = [int(c) for c in color[:3]]+[255]
+        self.renderer.clear()
+
+    def circle(self, color, pos, radius):
+        '''SDL2Backend.circle(color, pos, radius) -> None
+        draws a filled circle'''
+        if radius not in self.circles:
+            surface = pygame.Surface((radius*2, radius*2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, (255,255,255), (radius, radius), radius)
+            self.circles[radius] = self.video.Texture.from_surface(self.renderer, surface)
+        texture = self.circles[radius]
+        texture.color = [int(c) for c in color[:3]]
+        texture.draw(dstrect=(pos[0]-radius, pos[1]-radius, radius*2, radius*2))
+
+    def line(self, color, start, end, width=1):
+        '''SDL2Backend.line(color, start, end, width=1) -> None
+        draws a line'''
+        x, y = end[0]-start[0], end[1]-start[1]
+        self.pixel.color = [int(c) for c in color[:3]]
+        self.pixel.draw(dstrect=(start[0], start[1]-width/2, math.hypot(x, y), width),
+            angle=math.degrees(math.atan2(y, x)), origin=(0, width/2))
+
+    def blit(self, surface, pos, changed=False):
+        '''SDL2Backend.blit(surface, pos, changed=False) -> None
+        draws surface with its top-left corner at pos
+        changed is True if surface was drawn on since it was last blitted'''
+        if surface not in self.textures:
+            self.textures[surface] = self.video.Texture.from_surface(self.renderer, surface)
+        elif changed:
+            self.textures[surface].update(surface)
+        width, height = surface.get_size()
+        self.textures[surface].draw(dstrect=(pos[0], pos[1], width, height))
+
+    def present(self):
+        '''SDL2Backend.present() -> None
+        shows the frame on the window'''
+        self.renderer.present()
+
+BACKENDS = {"software":SoftwareBackend, "sdl2":SDL2Backend}
+
+class Bloom:
+    '''represents a glow post-process for a surface
+    the bright parts of the surface are blurred on a buffer 1/scale
+    of its size and added back, so the cost only depends on the size'''
+
+    def __init__(self, size, threshold=100, passes=2, scale=4, strength=255):
+        '''Bloom(size, threshold=100, passes=2, scale=4, strength=255) -> Bloom
+        constructs the bloom for surfaces of size
+        colors below threshold do not glow, strength is 0 to 255'''
+        self.size = size
+        self.threshold = threshold
+        self.passes = passes
+        self.strength = strength
+
+        # buffers are reused every frame
+        small = max(size[0]//scale, 1), max(size[1]//scale, 1)
+        self.small = pygame.Surface(small)
+        self.half = pygame.Surface((max(small[0]//2, 1), max(small[1]//2, 1)))
+        self.glow = pygame.Surface(size)
+
+    def blur_axis(self, array, axis):
+        '''Bloom.blur_axis(array, axis) -> array
+        returns array blurred along axis with a 1 4 6 4 1 kernel'''
+        pad = [(0,0)]*array.ndim
+        pad[axis] = (2,2)
+        padded = numpy.moveaxis(numpy.pad(array, pad, mode="edge"), axis, 0)
+        n = array.shape[axis]
+        blurred = (padded[:n]+4*padded[1:n+1]+6*padded[2:n+2]+4*padded[3:n+3]+padded[4:n+4]) >> 4
+        return numpy.moveaxis(blurred, 0, axis)
+
+    def blur(self):
+        '''Bloom.blur() -> None
+        blurs the small buffer'''
+        if numpy != None:
+            pixels = pygame.surfarray.pixels3d(self.small)
+            blurred = pixels.astype(numpy.uint16)
+            for i in range(self.passes):
+                blurred = self.blur_axis(self.blur_axis(blurred, 0), 1)
+            pixels[...] = blurred
+            del pixels
+
+        # without numpy, blur by scaling down and back up
+        else:
+            for i in range(self.passes):
+                pygame.transform.smoothscale(self.small, self.half.get_size(), self.half)
+                pygame.transform.smoothscale(self.half, self.small.get_size(), self.small)
+
+    def apply(self, surface):
+        '''Bloom.apply(surface) -> None
+        adds the glow to surface'''
+        pygame.transform.smoothscale(surface, self.small.get_size(), self.small)
+
+        # bright pass
+        threshold = self.threshold
+        self.small.fill((threshold,threshold,threshold), special_flags=pygame.BLEND_RGB_SUB)
+        self.blur()
+
+        if self.strength < 255:
+            strength = self.strength
+            self.small.fill((strength,strength,strength), special_flags=pygame.BLEND_RGB_MULT)
+        pygame.transform.smoothscale(self.small, self.size, self.glow)
+        surface.blit(self.glow, (0,0), special_flags=pygame.BLEND_RGB_ADD)
+
+class ControlServer:
+    '''represents a server for remote commands on localhost
+    clients send one JSON object per line, like {"command": "name", ...}
+    the server runs asyncio in its own thread and queues the commands,
+    the game handles them once per frame'''
+
+    def __init__(self, port=8765, path=None):
+        '''ControlServer(port=8765, path=None) -> ControlServer
+        constructs the server for TCP port on localhost
+        uses the unix socket at path instead if path is given'''
+        self.port = port
+        self.path = path
+        self.commands = queue.SimpleQueue()
+        self.loop = None
+        self.task = None
+        self.error = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        '''ControlServer.start() -> None
+        starts the server and waits until it is listening'''
+        self.thread.start()
+        self.ready.wait()
+        if self.error != None:
+            raise GameSetupError(f"Control server could not start: {self.error}")
+
+    def stop(self):
+        '''ControlServer.stop() -> None
+        stops the server'''
+        if self.loop != None:
+            self.loop.call_soon_threadsafe(self.task.cancel)
+
+    def run(self):
+        '''ControlServer.run() -> None
+        runs the server. used as the thread target'''
+        try:
+            asyncio.run(self.serve())
+        except asyncio.CancelledError:
+            pass
+
+    async def serve(self):
+        '''ControlServer.serve() -> None
+        listens for clients until stopped'''
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        try:
+            if self.path != None:
+                server = await asyncio.start_unix_server(self.handle, path=self.path)
+            else:
+                server = await asyncio.start_server(self.handle, "127.0.0.1", self.port)
+        except OSError as error:
+            self.error = error
+            self.loop = None
+            return
+        finally:
+            self.ready.set()
+
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        '''ControlServer.handle(reader, writer) -> None
+        queues every command sent by one client
+        only bad commands are answered, so clients never have to read'''
+        try:
+            while True:
+                try:
+                    # readline drops a line that is too long and raises ValueError
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    command = json.loads(line)
+                    if not isinstance(command, dict) or "command" not in command:
+                        raise ValueError("missing command")
+                except ValueError as error:
+                    writer.write(json.dumps({"ok":False, "error":str(error)}).encode()+b"\n")
+                    await writer.drain()
+                else:
+                    self.commands.put(command)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def get(self, limit=None):
+        '''ControlServer.get(limit=None) -> list
+        returns up to limit waiting commands, oldest first'''
+        commands = []
+        while limit == None or len(commands) < limit:
+            try:
+                commands.append(self.commands.get_nowait())
+            except queue.Empty:
+                break
+        return commands
+
+class Telemetry:
+    '''samples memory, live objects per class and list lengths at a low rate
+    samples are written one JSON object per line to a file that is rotated
+    when it gets too big. a value whose floor (its lowest value over the last
+    window samples) grows more than its threshold above the first window
+    raises a TelemetryWarning, so bursts do not count as leaks'''
+
+    def __init__(self, file, interval=5, thresholds=None, window=12, maxBytes=1000000, backups=3, trace=True):
+        '''Telemetry(file, interval=5, thresholds=None, window=12, maxBytes=1000000, backups=3, trace=True) -> Telemetry
+        constructs telemetry sampling every interval seconds into file
+        thresholds maps a value name ("memory" in bytes, a class name
+        or a watched name) to the growth allowed before warning
+        file is rotated into file.1 to file.backups after maxBytes
+        trace starts tracemalloc if it is not tracing already'''
+        self.file = file
+        self.interval = interval
+        self.thresholds = {} if thresholds == None else dict(thresholds)
+        self.window = window
+        self.maxBytes = maxBytes
+        self.backups = backups
+        self.classes = {}
+        self.watched = {}
+        self.first = {}
+        self.seen = collections.Counter()
+        self.recent = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        self.warned = set()
+        self.samples = 0
+        self.nextSample = time.monotonic()
+        self.tracing = trace and not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start()
+        self.snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+
+    def watch_class(self, cls):
+        '''Telemetry.watch_class(cls) -> None
+        counts the live objects of cls and its subclasses'''
+        self.classes[cls.__name__] = cls
+
+    def watch(self, name, getter):
+        '''Telemetry.watch(name, getter) -> None
+        records getter() (a number, like the length of a list) as name'''
+        self.watched[name] = getter
+
+    def check(self):
+        '''Telemetry.check() -> dict
+        takes a sample if one is due
+        returns the sample or None'''
+        now = time.monotonic()
+        if now < self.nextSample:
+            return None
+        self.nextSample = now+self.interval
+        return self.sample()
+
+    def sample(self):
+        '''Telemetry.sample() -> dict
+        takes, writes and checks a sample now'''
+        sample = {"time":round(time.time(), 3)}
+        if tracemalloc.is_tracing():
+            sample["memory"], sample["peak"] = tracemalloc.get_traced_memory()
+
+        # gc finds every object, only the watched types are counted
+        if len(self.classes) > 0:
+            names = {}
+            for name, cls in self.classes.items():
+                for kind in self.get_subclasses(cls):
+                    names.setdefault(kind, []).append(name)
+            counts = dict.fromkeys(self.classes, 0)
+            for kind, count in collections.Counter(type(obj) for obj in gc.get_objects() if type(obj) in names).items():
+                for name in names[kind]:
+                    counts[name] += count
+            sample["counts"] = counts
+        sample["sizes"] = {name:getter() for name, getter in self.watched.items()}
+
+        self.write(sample)
+        self.look_for_growth(sample)
+        self.samples += 1
+        return sample
+
+    def get_subclasses(self, cls):
+        '''Telemetry.get_subclasses(cls) -> list
+        returns cls and every class made from it'''
+        classes = [cls]
+        for kind in classes:
+            classes.extend(kind.__subclasses__())
+        return classes
+
+    def write(self, sample):
+        '''Telemetry.write(sample) -> None
+        adds sample to the file, rotating it first if it is too big'''
+        try:
+            if os.path.getsize(self.file) >= self.maxBytes:
+                for backup in range(self.backups-1, 0, -1):
+                    if os.path.exists(f"{self.file}.{backup}"):
+                        os.replace(f"{self.file}.{backup}", f"{self.file}.{backup+1}")
+                if self.backups > 0:
+                    os.replace(self.file, f"{self.file}.1")
+                else:
+                    os.remove(self.file)
+        except FileNotFoundError:
+            pass
+
+        with open(self.file, "a") as file:
+            file.write(json.dumps(sample)+"\n")
+
+    def look_for_growth(self, sample):
+        '''Telemetry.look_for_growth(sample) -> None
+        warns about every value whose floor grew past its threshold'''
+        values = dict(sample.get("counts", {}), **sample["sizes"])
+        if "memory" in sample:
+            values["memory"] = sample["memory"]
+
+        # every value's floor is measured from its own first window of samples
+        for name, value in values.items():
+            recent = self.recent[name]
+            recent.append(value)
+            self.seen[name] += 1
+            if self.seen[name] <= self.window:
+                self.first[name] = min(self.first.get(name, value), value)
+            if name not in self.thresholds or self.seen[name] <= self.window:
+                continue
+
+            growth = min(recent)-self.first[name]
+            if growth <= self.thresholds[name]:
+                self.warned.discard(name)
+            elif name not in self.warned:
+                self.warned.add(name)
+                warnings.warn(f"{name} grew by {growth} to {value}{self.get_growth_sites(name)}",
+                    TelemetryWarning, stacklevel=2)
+
+    def get_growth_sites(self, name):
+        '''Telemetry.get_growth_sites(name) -> str
+        returns the lines that allocated the most since the last
+        memory warning, if name is "memory" and tracemalloc is tracing'''
+        if name != "memory" or self.snapshot == None or not tracemalloc.is_tracing():
+            return ""
+        snapshot = tracemalloc.take_snapshot()
+        stats = snapshot.compare_to(self.snapshot, "lineno")[:3]
+        self.snapshot = snapshot
+        return "".join(f"\n  {stat}" for stat in stats)
+
+    def close(self):
+        '''Telemetry.close() -> None
+        stops tracemalloc if the telemetry started it'''
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+        self.snapshot = None
+
+class FrameSink:
+    '''publishes the rendered frames of a game from a worker thread
+    intended to be inherited from, Sink.write(frame) gets the RGB bytes
+    of a frame. frames published while the worker is busy are dropped,
+    so a slow consumer never holds up the game'''
+
+    def __init__(self, size, rate=30):
+        '''FrameSink(size, rate=30) -> FrameSink
+        constructs the sink for frames of size
+        at most rate frames a second are published'''
+        self.size = size
+        self.interval = 1/rate
+        self.lastFrame = 0
+        self.frame = None
+        self.busy = False
+        self.running = True
+        self.published = 0
+        self.dropped = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        '''FrameSink.start() -> None
+        starts the worker thread'''
+        self.thread.start()
+
+    def stop(self):
+        '''FrameSink.stop() -> None
+        stops the worker thread'''
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread.is_alive():
+            self.thread.join(1)
+
+    def get_stats(self):
+        '''FrameSink.get_stats() -> (published, dropped)
+        returns how many frames were published and dropped'''
+        return self.published, self.dropped
+
+    def is_due(self):
+        '''FrameSink.is_due() -> bool
+        returns whether it is time to publish another frame'''
+        now = time.monotonic()
+        if now-self.lastFrame < self.interval:
+            return False
+        self.lastFrame = now
+        return True
+
+    def publish(self, surface):
+        '''FrameSink.publish(surface) -> None
+        hands the frame on surface to the worker
+        the frame is dropped if the worker has not finished the last one'''
+        if not self.is_due():
+            return
+        if self.busy:
+            self.dropped += 1
+            return
+
+        # the game draws the next frame while the worker encodes this one,
+        # so the worker cannot read the surface itself. this is the one copy
+        frame = pygame.image.tobytes(surface, "RGB")
+        with self.condition:
+            self.frame = frame
+            self.busy = True
+            self.condition.notify_all()
+
+    def run(self):
+        '''FrameSink.run() -> None
+        writes every frame handed over. used as the thread target'''
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.frame != None or not self.running)
+                if not self.running:
+                    break
+                frame, self.frame = self.frame, None
+
+            try:
+                self.write(frame)
+                self.published += 1
+            finally:
+                self.busy = False
+        self.close()
+
+    def write(self, frame):
+        '''FrameSink.write(frame) -> None
+        place holder. This method is meant to be overridden
+        publishes frame, the RGB bytes of one frame'''
+        pass
+
+    def close(self):
+        '''FrameSink.close() -> None
+        place holder. This method is meant to be overridden
+        frees what the sink uses, called by the worker when stopped'''
+        pass
+
+class MJPEGSink(FrameSink):
+    '''serves the frames as JPEGs over HTTP
+    /stream.mjpg (or /) streams every frame, /frame.jpg gets the newest one'''
+
+    def __init__(self, size, rate=30, port=8080, host="127.0.0.1"):
+        '''MJPEGSink(size, rate=30, port=8080, host="127.0.0.1") -> MJPEGSink
+        constructs the sink serving on host and port'''
+        FrameSink.__init__(self, size, rate)
+        self.jpeg = None
+        self.sequence = 0
+        self.encoded = threading.Condition()
+        try:
+            self.server = http.server.ThreadingHTTPServer((host, port), MJPEGHandler)
+        except OSError as error:
+            raise GameSetupError(f"MJPEG server could not start: {error}")
+        self.server.daemon_threads = True
+        self.server.sink = self
+        self.serverThread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        '''MJPEGSink.start() -> None
+        starts the worker and the server'''
+        FrameSink.start(self)
+        self.serverThread.start()
+
+    def stop(self):
+        '''MJPEGSink.stop() -> None
+        stops the worker, the server and every stream'''
+        FrameSink.stop(self)
+        with self.encoded:
+            self.encoded.notify_all()
+
+    def write(self, frame):
+        '''MJPEGSink.write(frame) -> None
+        encodes frame and wakes up the streams'''
+        file = io.BytesIO()
+        pygame.image.save(pygame.image.frombuffer(frame, self.size, "RGB"), file, "frame.jpg")
+        with self.encoded:
+            self.jpeg = file.getvalue()
+            self.sequence += 1
+            self.encoded.notify_all()
+
+    def wait_jpeg(self, sequence, timeout=1):
+        '''MJPEGSink.wait_jpeg(sequence, timeout=1) -> (int, bytes)
+        waits for a JPEG newer than sequence and returns it with its sequence
+        returns (sequence, None) if there is none by timeout or the sink stopped'''
+        with self.encoded:
+            self.encoded.wait_for(lambda: self.sequence != sequence or not self.running, timeout)
+            if self.sequence == sequence or not self.running:
+                return sequence, None
+            return self.sequence, self.jpeg
+
+    def close(self):
+        '''MJPEGSink.close() -> None
+        shuts down the server'''
+        self.server.shutdown()
+        self.server.server_close()
+
+class MJPEGHandler(http.server.BaseHTTPRequestHandler):
+    '''private class answering MJPEGSink requests'''
+
+    def do_GET(self):
+        '''MJPEGHandler.do_GET() -> None
+        answers one request'''
+        sink = self.server.sink
+        if self.path == "/frame.jpg":
+            sequence, jpeg = sink.wait_jpeg(0 if sink.jpeg == None else -1)
+            if jpeg == None:
+                self.send_error(503)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(jpeg)))
+            self.end_headers()
+            self.wfile.write(jpeg)
+            return
+        if self.path not in ("/", "/stream.mjpg"):
+            self.send_error(404)
+            return
+
+        # a slow client only gets the newest frame each time it catches up
+        self.send_response(200)
+        self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        sequence = 0
+        try:
+            while sink.running:
+                sequence, jpeg = sink.wait_jpeg(sequence)
+                if jpeg == None:
+                    continue
+                self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                    +str(len(jpeg)).encode()+b"\r\n\r\n"+jpeg+b"\r\n")
+        except ConnectionError:
+            pass
+
+    def log_message(self, format, *args):
+        '''MJPEGHandler.log_message(format, *args) -> None
+        keeps requests out of the game's output'''
+        pass
+
+class SharedFrames:
+    '''represents a ring of raw RGB frames in shared memory
+    the header is (b"GSFR", width, height, slots, newest slot) and every
+    slot is its sequence number then the frame. a slot's sequence is 0
+    while it is being written, so readers can tell torn frames'''
+
+    header = struct.Struct("<4sIIII")
+    slotHeader = struct.Struct("<Q")
+
+    def __init__(self, name, size=None, slots=3):
+        '''SharedFrames(name, size=None, slots=3) -> SharedFrames
+        creates the frames called name for frames of size
+        if size is None, opens the frames made by another process'''
+        if size == None:
+            self.memory = shared_memory.SharedMemory(name)
+            magic, width, height, slots, newest = self.header.unpack_from(self.memory.buf)
+            if magic != b"GSFR":
+                self.memory.close()
+                raise GameSetupError(f"{name} is not shared frames")
+            size = width, height
+
+            # only the creator should remove the memory (fixed in Python 3.13)
+            if sys.version_info < (3,13):
+                resource_tracker.unregister(self.memory._name, "shared_memory")
+            self.owner = False
+        else:
+            frameSize = size[0]*size[1]*3
+            self.memory = shared_memory.SharedMemory(name, True,
+                self.header.size+slots*(self.slotHeader.size+frameSize))
+            self.header.pack_into(self.memory.buf, 0, b"GSFR", size[0], size[1], slots, 0)
+            self.owner = True
+
+        self.name = name
+        self.size = tuple(size)
+        self.slots = slots
+        self.frameSize = self.size[0]*self.size[1]*3
+        self.sequence = 0
+
+    def get_offset(self, slot):
+        '''SharedFrames.get_offset(slot) -> int
+        returns where slot starts in the shared memory'''
+        return self.header.size+slot*(self.slotHeader.size+self.frameSize)
+
+    def write(self, frame):
+        '''SharedFrames.write(frame) -> None
+        writes frame, RGB bytes or a Surface, into the slot after the newest one
+        with numpy a Surface is copied straight from its pixels into the slot'''
+        buffer = self.memory.buf
+        slot = (self.header.unpack_from(buffer)[4]+1) % self.slots
+        offset = self.get_offset(slot)
+        start = offset+self.slotHeader.size
+
+        self.slotHeader.pack_into(buffer, offset, 0)
+        if isinstance(frame, pygame.Surface) and numpy != None and frame.get_bytesize() == 4:
+            self.copy_pixels(frame, numpy.frombuffer(buffer, numpy.uint8, self.frameSize, start))
+        else:
+            if isinstance(frame, pygame.Surface):
+                frame = pygame.image.tobytes(frame, "RGB")
+            buffer[start:start+self.frameSize] = frame
+        self.sequence += 1
+        self.slotHeader.pack_into(buffer, offset, self.sequence)
+        struct.pack_into("<I", buffer, self.header.size-4, slot)
+
+    def copy_pixels(self, surface, pixels):
+        '''SharedFrames.copy_pixels(surface, pixels) -> None
+        copies the 32 bit surface into pixels, an array of RGB bytes by row
+        each color is copied straight out of the surface's own buffer'''
+        width, height = self.size
+        raw = numpy.frombuffer(surface.get_buffer(), numpy.uint8).reshape(height, surface.get_pitch())
+        raw = raw[:,:width*4].reshape(height, width, 4)
+        pixels = pixels.reshape(height, width, 3)
+        for color, shift in enumerate(surface.get_shifts()[:3]):
+            byte = shift//8 if sys.byteorder == "little" else 3-shift//8
+            pixels[:,:,color] = raw[:,:,byte]
+
+    def read(self, sequence=0):
+        '''SharedFrames.read(sequence=0) -> (int, Surface)
+        returns the newest frame and its sequence
+        returns (sequence, None) if there is no frame newer than sequence'''
+        buffer = self.memory.buf
+        for attempt in range(3):
+            slot = self.header.unpack_from(buffer)[4]
+            offset = self.get_offset(slot)
+            start = offset+self.slotHeader.size
+            before = self.slotHeader.unpack_from(buffer, offset)[0]
+            if before == 0 or before == sequence:
+                return sequence, None
+            frame = bytes(buffer[start:start+self.frameSize])
+            if self.slotHeader.unpack_from(buffer, offset)[0] == before:
+                return before, pygame.image.frombuffer(frame, self.size, "RGB")
+        return sequence, None
+
+    def close(self):
+        '''SharedFrames.close() -> None
+        closes the frames, removing them if this process made them'''
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+class SharedMemorySink(FrameSink):
+    '''writes the frames raw into SharedFrames for other processes
+    frames are copied from the screen straight into the shared memory on
+    the game's thread, there is nothing to encode and readers never wait'''
+
+    def __init__(self, size, rate=30, name="gamesetup_frames", slots=3):
+        '''SharedMemorySink(size, rate=30, name="gamesetup_frames", slots=3) -> SharedMemorySink
+        constructs the sink writing into shared frames called name
+        other processes read them with SharedFrames(name).read()'''
+        FrameSink.__init__(self, size, rate)
+        try:
+            self.frames = SharedFrames(name, size, slots)
+        except FileExistsError:
+            raise GameSetupError(f"Shared frames {name} are already in use")
+
+    def publish(self, surface):
+        '''SharedMemorySink.publish(surface) -> None
+        copies the frame on surface into the shared frames'''
+        if self.is_due():
+            self.frames.write(surface)
+            self.published += 1
+
+    def write(self, frame):
+        '''SharedMemorySink.write(frame) -> None
+        copies frame into the shared frames'''
+        self.frames.write(frame)
+
+    def close(self):
+        '''SharedMemorySink.close() -> None
+        removes the shared frames'''
+        self.frames.close()
+
+SINKS = {"mjpeg":MJPEGSink, "shm":SharedMemorySink}
+
+def find_snapshots(directory):
+    '''find_snapshots(directory) -> list
+    returns (time, file) for every snapshot in directory, oldest first'''
+    snapshots = []
+    for file in glob.glob(os.path.join(directory, "*.snap")):
+        try:
+            snapshots.append((float(os.path.basename(file)[:-5]), file))
+        except ValueError:
+            pass
+    snapshots.sort()
+    return snapshots
+
+def read_snapshot(file):
+    '''read_snapshot(file) -> bytes
+    returns the snapshot saved in file'''
+    with open(file, "rb") as snapshot:
+        return zlib.decompress(snapshot.read())
+
+class SnapshotWriter:
+    '''saves snapshots of a game every interval seconds of real time
+    Game.snapshot() is called in the game's thread, the snapshot is
+    compressed and written by a worker thread. a snapshot made while the
+    worker is still writing replaces the waiting one. only the newest
+    keep snapshots are kept, each file is named by its game time'''
+
+    def __init__(self, game, directory, interval=1, keep=600):
+        '''SnapshotWriter(game, directory, interval=1, keep=600) -> SnapshotWriter
+        constructs the writer saving game's snapshots into directory'''
+        os.makedirs(directory, exist_ok=True)
+        self.game = game
+        self.directory = directory
+        self.interval = interval
+        self.keep = keep
+        self.nextSnapshot = time.monotonic()+interval
+        self.snapshot = None
+        self.running = True
+        self.written = 0
+        self.dropped = 0
+        self.condition = threading.Condition()
+        self.writing = threading.Lock()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def get_directory(self):
+        '''SnapshotWriter.get_directory() -> str
+        returns the directory of the snapshots'''
+        return self.directory
+
+    def start(self):
+        '''SnapshotWriter.start() -> None
+        starts the worker thread'''
+        self.thread.start()
+
+    def stop(self):
+        '''SnapshotWriter.stop() -> None
+        writes the waiting snapshot and stops the worker thread'''
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread.is_alive():
+            self.thread.join(5)
+
+    def check(self):
+        '''SnapshotWriter.check() -> None
+        takes a snapshot if one is due'''
+        now = time.monotonic()
+        if now < self.nextSnapshot:
+            return
+        self.nextSnapshot = now+self.interval
+        self.save()
+
+    def save(self):
+        '''SnapshotWriter.save() -> None
+        takes a snapshot now and hands it to the worker'''
+        snapshot = self.game.snapshot()
+        if snapshot == None:
+            return
+        with self.condition:
+            if self.snapshot != None:
+                self.dropped += 1
+            self.snapshot = snapshot
+            self.condition.notify_all()
+
+    def discard_after(self, seconds):
+        '''SnapshotWriter.discard_after(seconds) -> None
+        removes the snapshots later than game time seconds
+        used when the game goes back in time'''
+        with self.condition, self.writing:
+            self.snapshot = None
+            for snapshotTime, file in find_snapshots(self.directory):
+                if snapshotTime > seconds:
+                    os.remove(file)
+
+    def run(self):
+        '''SnapshotWriter.run() -> None
+        writes every snapshot handed over. used as the thread target'''
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.snapshot != None or not self.running)
+                if self.snapshot == None:
+                    break
+                (seconds, data), self.snapshot = self.snapshot, None
+                self.writing.acquire()
+            try:
+                self.write(seconds, data)
+            finally:
+                self.writing.release()
+
+    def write(self, seconds, data):
+        '''SnapshotWriter.write(seconds, data) -> None
+        writes the snapshot data taken at game time seconds
+        the file only appears once it is complete'''
+        file = os.path.join(self.directory, f"{seconds:012.3f}.snap")
+        with open(file+".tmp", "wb") as snapshot:
+            snapshot.write(zlib.compress(data, 1))
+        os.replace(file+".tmp", file)
+        self.written += 1
+
+        snapshots = find_snapshots(self.directory)
+        for snapshotTime, old in snapshots[:max(len(snapshots)-self.keep, 0)]:
+            os.remove(old)
+
 class Game:
     '''represents the game object
     intended to be inherited from. includes methods like after
@@ -598,18 +1641,39 @@ class Game:
     you must call Game.mainloop() to start your game
     your Game.update() method will be called every iteration of mainloop'''
 
-    def __init__(self):
-        '''Game() -> Game
-        constructs the game'''
+    def __init__(self, remake=None):
+        '''Game(remake=None) -> Game
+        constructs the game
+        remake is called with no arguments to construct the game again on
+        cold restarts, subclasses with arguments should pass one'''
+        self.remake = remake
         self.restarting = False
+        self.resetting = False
         self.isGameRunning = True
+        self.maxStep = 1/60
+        self.maxSteps = 64
+        self.maxTimeScale = 32
         self.afterEvents = []
+        self.timers = {}
+        self.timerClock = Clock()
+        self.timerClock.start()
+        self.nextID = 0
         self.soundsList = []
         self.isGameMuted = False
         self.screen = None
+        self.backend = None
         self.widgets = {}
         self.gameFocusedWidget = None
         self.bindings = {}
+        self.bindingTypes = {}
+        self.mousePos = pygame.mouse.get_pos()
+        self.controlServer = None
+        self.telemetry = None
+        self.sink = None
+        self.recorder = None
+        self.commandHandlers = {}
+        self.images = {}
+        self.cache = {}
 
     def focus(self, focus=None):
         '''Game.focus(focus=None) -> type
@@ -627,14 +1691,68 @@ class Game:
 
     def get_screen(self):
         '''Game.get_screen() -> type
-        returns the game screen'''
+        returns the game screen
+        returns None if the backend has no display surface'''
         return self.screen
 
+    def set_mode(self, size, caption=None, backend=None):
+        '''Game.set_mode(size, caption=None, backend=None) -> None
+        opens the game window drawn by backend ("software" or "sdl2")
+        if backend not given, uses $GAMESETUP_BACKEND or "software"
+        falls back to software drawing if backend cannot start'''
+        if backend == None:
+            backend = os.environ.get("GAMESETUP_BACKEND", "software")
+        if backend not in BACKENDS:
+            raise GameSetupError(f"Unknown backend {backend}. Must be in\n"+str(list(BACKENDS)))
+
+        try:
+            self.backend = BACKENDS[backend](size)
+        except (ImportError, pygame.error):
+            self.backend = SoftwareBackend(size)
+        self.screen = self.backend.get_screen()
+        if caption != None:
+            self.set_caption(caption)
+
+    def get_backend(self):
+        '''Game.get_backend() -> backend
+        returns the backend drawing the game'''
+        return self.backend
+
+    def get_size(self):
+        '''Game.get_size() -> (width, height)
+        returns the size of the game window'''
+        return self.backend.get_size()
+
+    def set_caption(self, caption):
+        '''Game.set_caption(caption) -> None
+        sets the title of the game window'''
+        self.backend.set_caption(caption)
+
     def is_muted(self):
         '''Game.is_muted() -> bool
         returns whether the game is muted or not'''
         return self.isGameMuted
 
+    def get_mouse_pos(self):
+        '''Game.get_mouse_pos() -> (x,y)
+        returns the mouse position as of the last mouse motion event'''
+        return self.mousePos
+
+    def get_time_scale(self):
+        '''Game.get_time_scale() -> float
+        returns how fast the game runs compared to real time'''
+        return timeline.get_scale()
+
+    def set_time_scale(self, scale):
+        '''Game.set_time_scale(scale) -> None
+        sets how fast every clock and timer runs
+        0 pauses, 0.5 is slow motion, 8 is fast forward
+        scale is kept between 0 and Game.maxTimeScale
+        raises ValueError if scale is not a finite number'''
+        if not math.isfinite(scale):
+            raise ValueError(f"bad time scale {scale}")
+        timeline.set_scale(min(max(scale, 0), self.maxTimeScale))
+
     def get_widgets(self):
         '''Game.get_widgets() -> dict
         returns all widgets'''
@@ -652,10 +1770,53 @@ class Game:
         adds widget to game'''
         self.widgets[widgetID] = widget
 
+    def load_image(self, file):
+        '''Game.load_image(file) -> Surface
+        returns the image in file, only loading it once'''
+        if file not in self.images:
+            self.images[file] = pygame.image.load(file)
+        return self.images[file]
+
+    def cached(self, key, make):
+        '''Game.cached(key, make) -> value
+        returns the value saved for key
+        calls make() to get the value the first time'''
+        if key not in self.cache:
+            self.cache[key] = make()
+        return self.cache[key]
+
     def after(self, ms, command):
-        '''Game.after(ms, command) -> time
-        performs command after ms milliseconds'''
-        self.afterEvents.append(AfterEvent(self.afterEvents, ms, command))
+        '''Game.after(ms, command) -> int
+        performs command after ms milliseconds
+        returns an ID that can be given to Game.cancel'''
+        ID = self.get_clear_id()
+        event = AfterEvent(ID, self.timerClock.get_time()+ms/1000, command)
+        self.timers[ID] = event
+        heapq.heappush(self.afterEvents, event)
+        return ID
+
+    def cancel(self, ID):
+        '''Game.cancel(ID) -> None
+        cancels the after event with ID'''
+        event = self.timers.pop(ID, None)
+        if event == None:
+            return
+        event.completed = True
+
+        # cancelled events are dropped when due, unless they pile up
+        if len(self.afterEvents) > 2*len(self.timers)+64:
+            self.afterEvents[:] = [event for event in self.afterEvents if not event.completed]
+            heapq.heapify(self.afterEvents)
+
+    def check_after(self):
+        '''Game.check_after() -> None
+        performs every after event that is due'''
+        now = self.timerClock.get_time()
+        while len(self.afterEvents) > 0 and self.afterEvents[0].due <= now:
+            event = heapq.heappop(self.afterEvents)
+            if not event.completed:
+                self.timers.pop(event.ID, None)
+                event.check(now)
 
     def sound(self, file, volume=1):
         '''Game.sound(file, volume=1) -> Sound
@@ -679,24 +1840,67 @@ class Game:
             sound.unmute()
         self.isGameMuted = False
 
-    def restart(self):
-        '''Game.restart() -> None
-        completely restarts the game
-        restarts pygame as well'''
-        self.isGameRunning = False
-        self.restarting = True
+    def restart(self, warm=True):
+        '''Game.restart(warm=True) -> None
+        restarts the game
+        a warm restart resets the game with Game.reset() but keeps
+        pygame, the window, images and caches. otherwise restarts
+        pygame as well and constructs the game again (see Game.rebuild)'''
+        if warm:
+            self.resetting = True
+        else:
+            self.isGameRunning = False
+            self.restarting = True
+
+    def setup(self):
+        '''Game.setup() -> None
+        place holder. This method is meant to be overridden
+        sets up the game state, it is called again on warm restarts'''
+        pass
+
+    def reset(self):
+        '''Game.reset() -> None
+        clears the timers, bindings and widgets and sets up the game again
+        called by the mainloop after Game.restart()'''
+        self.resetting = False
+        self.afterEvents.clear()
+        self.timers.clear()
+        self.unbind()
+        self.commandHandlers.clear()
+        self.widgets.clear()
+        self.gameFocusedWidget = None
+        self.setup()
 
     def close(self):
         '''Game.close() -> None
         closes the game window'''
         self.isGameRunning = False
 
+    def step(self, seconds):
+        '''Game.step(seconds) -> None
+        place holder. This method is meant to be overridden
+        moves the game forward by seconds of simulation time without
+        drawing. it may be called several times between updates'''
+        pass
+
     def update(self):
         '''Game.update() -> None
         place holder. This method is meant to be overridden
         don't forget to update your display!'''
         pass
 
+    def advance(self):
+        '''Game.advance() -> None
+        moves the simulation forward to the current time
+        in steps of at most Game.maxStep, unless that takes more
+        than Game.maxSteps steps'''
+        elapsed = timeline.tick()
+        steps = min(max(math.ceil(elapsed/self.maxStep), 1), self.maxSteps)
+        for i in range(steps):
+            timeline.advance(elapsed/steps)
+            self.check_after()
+            self.step(elapsed/steps)
+
     def event(self, event):
         '''Game.event(event) -> None
         checks up an event. This method is meant to be overridden'''
@@ -710,67 +1914,241 @@ class Game:
         if centery:
             pos = pos[0], pos[1]-surface.get_rect().height/2
             
-        self.screen.blit(surface, pos)
+        self.backend.blit(surface, pos)
 
     def bind(self, eventType, command, ID=None):
-        '''Game.bind(ID, eventType, command) -> None
+        '''Game.bind(eventType, command, ID=None) -> ID
         binds eventType to command and returns ID
-        if ID not given, ID will be automatically a non-used ID'''
+        if ID not given, ID will be automatically a non-used ID
+        if ID is already bound, the old binding is replaced'''
         if ID == None:
             ID = self.get_clear_id()
+        elif ID in self.bindings:
+            self.unbind(ID)
         self.bindings[ID] = (eventType, command)
+        self.bindingTypes.setdefault(eventType, {})[ID] = command
         return ID
 
+    def bind_all(self, bindings):
+        '''Game.bind_all(bindings) -> list
+        binds every (eventType, command) in bindings
+        returns the list of new IDs'''
+        return [self.bind(eventType, command) for eventType, command in bindings]
+
     def unbind(self, ID=None):
-        '''Game.unbind(eventType) -> None
+        '''Game.unbind(ID=None) -> None
         unbinds event from ID
         if ID not given, unbinds all'''
-        if eventType == None:
+        if ID == None:
             self.bindings.clear()
-        if eventType in self.bindings:
-            self.bindings.pop(ID)
+            self.bindingTypes.clear()
+        elif ID in self.bindings:
+            eventType = self.bindings.pop(ID)[0]
+            self.bindingTypes[eventType].pop(ID)
+
+    def unbind_all(self, IDs):
+        '''Game.unbind_all(IDs) -> None
+        unbinds every ID in IDs'''
+        for ID in IDs:
+            self.unbind(ID)
+
+    def serve(self, port=8765, path=None):
+        '''Game.serve(port=8765, path=None) -> ControlServer
+        starts a control server on localhost (see ControlServer)
+        commands are sent to the handlers set with Game.on_command'''
+        self.controlServer = ControlServer(port, path)
+        self.controlServer.start()
+        return self.controlServer
+
+    def monitor(self, file, interval=5, thresholds=None):
+        '''Game.monitor(file, interval=5, thresholds=None) -> Telemetry
+        starts sampling telemetry into file (see Telemetry)
+        timers, bindings, widgets, sounds and after events are watched'''
+        self.telemetry = Telemetry(file, interval, thresholds)
+        self.telemetry.watch_class(AfterEvent)
+        self.telemetry.watch_class(Sound)
+        self.telemetry.watch("afterEvents", lambda: len(self.afterEvents))
+        self.telemetry.watch("timers", lambda: len(self.timers))
+        self.telemetry.watch("bindings", lambda: len(self.bindings))
+        self.telemetry.watch("widgets", lambda: len(self.widgets))
+        self.telemetry.watch("sounds", lambda: len(self.soundsList))
+        return self.telemetry
+
+    def stream(self, kind="mjpeg", **options):
+        '''Game.stream(kind="mjpeg", **options) -> FrameSink
+        publishes every frame drawn through a sink ("mjpeg" or "shm")
+        options go to the sink (see MJPEGSink and SharedMemorySink)'''
+        if kind not in SINKS:
+            raise GameSetupError(f"Unknown sink {kind}. Must be in\n"+str(list(SINKS)))
+        if self.screen == None:
+            raise GameSetupError("Frames can only be streamed from the software backend")
+        self.sink = SINKS[kind](self.get_size(), **options)
+        self.sink.start()
+        return self.sink
+
+    def record(self, directory, interval=1, keep=600):
+        '''Game.record(directory, interval=1, keep=600) -> SnapshotWriter
+        saves a snapshot of the game into directory every interval seconds
+        (see SnapshotWriter). the game must have a Game.snapshot() method'''
+        self.recorder = SnapshotWriter(self, directory, interval, keep)
+        self.recorder.start()
+        return self.recorder
+
+    def snapshot(self):
+        '''Game.snapshot() -> (float, bytes)
+        place holder. This method is meant to be overridden
+        returns the game time and the saved state of the game
+        returns None if the game cannot be saved'''
+        return None
+
+    def load_snapshot(self, data):
+        '''Game.load_snapshot(data) -> float
+        place holder. This method is meant to be overridden
+        sets the game to the state data from Game.snapshot()
+        returns the game time of the snapshot'''
+        raise GameSetupError("This game cannot load snapshots")
+
+    def resume(self, directory, seconds=None):
+        '''Game.resume(directory, seconds=None) -> float
+        loads the newest snapshot in directory, or the newest one not after
+        game time seconds and then moves the game forward to seconds.
+        seconds past the newest snapshot goes to the newest snapshot
+        returns the game time reached, None if there is no snapshot'''
+        snapshots = find_snapshots(directory)
+        if seconds != None and len(snapshots) > 0:
+            if not math.isfinite(seconds):
+                raise ValueError(f"bad game time {seconds}")
+            seconds = min(seconds, snapshots[-1][0])
+            snapshots = [snapshot for snapshot in snapshots if snapshot[0] <= seconds]
+        if len(snapshots) == 0:
+            return None
+
+        reached = self.load_snapshot(read_snapshot(snapshots[-1][1]))
+        if seconds != None:
+            self.skip(seconds-reached)
+            reached = seconds
+        if self.recorder != None and os.path.samefile(directory, self.recorder.get_directory()):
+            self.recorder.discard_after(reached)
+        return reached
+
+    def skip(self, seconds):
+        '''Game.skip(seconds) -> None
+        moves the simulation forward by seconds without drawing'''
+        steps = max(math.ceil(seconds/self.maxStep), 0)
+        for i in range(steps):
+            timeline.advance(seconds/steps)
+            self.check_after()
+            self.step(seconds/steps)
+
+    def on_command(self, name, handler=None):
+        '''Game.on_command(name, handler=None) -> None
+        calls handler(command) for control server commands called name
+        if handler is None, removes the handler'''
+        if handler == None:
+            self.commandHandlers.pop(name, None)
+        else:
+            self.commandHandlers[name] = handler
+
+    def process_commands(self, limit=1000):
+        '''Game.process_commands(limit=1000) -> None
+        handles up to limit commands from the control server
+        the rest wait for the next frame'''
+        if self.controlServer == None:
+            return
+
+        for command in self.controlServer.get(limit):
+            # bad commands from clients must not stop the game
+            # numbers too big for a float raise OverflowError
+            try:
+                if not isinstance(command["command"], str):
+                    continue
+                handler = self.commandHandlers.get(command["command"])
+                if handler == None:
+                    continue
+                handler(command)
+            except (KeyError, IndexError, TypeError, ValueError, AttributeError, OverflowError):
+                pass
 
     def get_clear_id(self):
-        '''Game.get_clear_id() -> str
-        returns an id that is not bound'''
-        i = 0
-        while True:
-            ID = f"generated_event_id_{i}"
-            if ID not in self.bindings:
-                return ID
-            i += 1
+        '''Game.get_clear_id() -> GeneratedID
+        returns an id that has never been used for a binding or timer'''
+        self.nextID += 1
+        return GeneratedID(self.nextID)
             
+    def rebuild(self):
+        '''Game.rebuild() -> None
+        restarts pygame and constructs the game again with Game.remake,
+        or Game.__init__ if there is none. the control server, telemetry,
+        sink and snapshot writer carry on, the old snapshots are discarded'''
+        services = self.controlServer, self.telemetry, self.sink, self.recorder
+        pygame.quit()
+        pygame.init()
+        if self.remake == None:
+            Game.__init__(self)
+        else:
+            self.remake()
+        self.controlServer, self.telemetry, self.sink, self.recorder = services
+        if self.recorder != None:
+            self.recorder.discard_after(0)
+
     def mainloop(self):
         '''Game.mainloop() -> None
         starts the mainloop for the game'''
+        while True:
+            self.run_frames()
+            if not self.restarting:
+                break
+            self.rebuild()
+
+        # quit
+        if self.controlServer != None:
+            self.controlServer.stop()
+        if self.telemetry != None:
+            self.telemetry.close()
+        if self.sink != None:
+            self.sink.stop()
+        if self.recorder != None:
+            self.recorder.stop()
+        pygame.quit()
+
+    def run_frames(self):
+        '''Game.run_frames() -> None
+        runs frames until the game is closed or restarted cold'''
+        timeline.drive()
         while self.isGameRunning:
-            # check all after events
-            for event in self.afterEvents[:]:
-                event.check()
+            if self.resetting:
+                self.reset()
+
+            # move the simulation and check all after events
+            self.advance()
+            self.process_commands()
 
             # other events
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.close()
+                elif event.type == pygame.MOUSEMOTION:
+                    self.mousePos = event.pos
 
                 # process event in widgets
                 for widget in self.widgets:
                     self.widgets[widget].process_event(event)
 
                 # process event for bindings
-                for binding in self.bindings:
-                    if event.type == self.bindings[binding][0]:
+                if event.type in self.bindingTypes:
+                    for command in list(self.bindingTypes[event.type].values()):
                         try:
-                            self.bindings[binding][1](event)
+                            command(event)
                         except TypeError:
-                            self.bindings[binding][1]()
+                            command()
                     
                 self.event(event)
 
             self.update()
-
-        # quit or restart
-        pygame.quit()
-        if self.restarting:
-            pygame.init()
-            self.__init__()
+            if self.sink != None:
+                self.sink.publish(self.screen)
+            if self.telemetry != None:
+                self.telemetry.check()
+            if self.recorder != None:
+                self.recorder.check()
+        timeline.release()
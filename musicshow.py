@@ -0,0 +1,234 @@
+# Name: Music Show
+# Author: G.G.Otto
+# Date: 10/19/2026
+# Version: 1.0
+#
+# Makes a fireworks show from a WAV file.
+# The track is memory-mapped and analysed in chunks with NumPy:
+# spectral flux finds the onsets, its autocorrelation finds the
+# beats, and every loud enough beat becomes a launch. The show is
+# then played back following the mixer clock.
+#
+# usage: python musicshow.py song.wav [--save show.json] [--analyse-only]
+
+import pygame, numpy, struct, json, time, argparse, functools
+import fireworks as fw
+
+# how long a rocket takes to reach its burst
+ASCENT = 0.5
+
+# how long a tube is busy after a launch: the ascent, 2 seconds
+# before the rocket is restored, the restore and a little to spare
+BUSY = ASCENT+2+0.5+0.1
+
+# burst colors from quiet to loud
+PALETTE = ["blue", "green", "yellow", "pink", "red"]
+
+# sample types by (format tag, bits)
+FORMATS = {(1,8):numpy.uint8, (1,16):numpy.int16, (1,32):numpy.int32, (3,32):numpy.float32, (3,64):numpy.float64}
+
+def read_wave(file):
+    '''read_wave(file) -> (array, int)
+    memory-maps the samples of a PCM or float WAV file
+    returns an array of shape (frames, channels) and the sample rate'''
+    fmt = None
+    with open(file, "rb") as wav:
+        riff, size, wave = struct.unpack("<4sI4s", wav.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{file} is not a WAV file")
+
+        # find the format and data chunks
+        while True:
+            header = wav.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{file} has no data")
+            chunk, chunkSize = struct.unpack("<4sI", header)
+            if chunk == b"data":
+                offset = wav.tell()
+                break
+            data = wav.read(chunkSize+chunkSize%2)
+            if chunk == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", data[:16])
+
+                # extensible formats keep the real format tag in the sub format
+                if fmt[0] == 0xFFFE and len(data) >= 26:
+                    fmt = struct.unpack("<H", data[24:26])+fmt[1:]
+
+        wav.seek(0, 2)
+        end = wav.tell()
+
+    if fmt == None:
+        raise ValueError(f"{file} has no format")
+    formatTag, channels, rate, byteRate, blockAlign, bits = fmt
+    if (formatTag, bits) not in FORMATS:
+        raise ValueError(f"{file} has unsupported samples (format {formatTag}, {bits} bits)")
+
+    frames = (min(offset+chunkSize, end)-offset)//blockAlign
+    samples = numpy.memmap(file, FORMATS[formatTag, bits], "r", offset, (frames, channels))
+    return samples, rate
+
+def to_mono(samples):
+    '''to_mono(samples) -> array
+    returns samples mixed to one float32 channel from -1 to 1'''
+    mono = samples.mean(axis=1, dtype=numpy.float32)
+    if samples.dtype == numpy.uint8:
+        return (mono-128)/128
+    if samples.dtype.kind == "i":
+        return mono/numpy.iinfo(samples.dtype).max
+    return mono
+
+def analyse(samples, rate, size=1024, hop=512, chunk=2048):
+    '''analyse(samples, rate, size=1024, hop=512, chunk=2048) -> dict
+    returns the spectral flux, loudness and spectral centroid of every
+    window of size samples, windows start every hop samples.
+    chunk windows are transformed at once'''
+    count = max((len(samples)-size)//hop+1, 0)
+    flux = numpy.zeros(count, numpy.float32)
+    loudness = numpy.zeros(count, numpy.float32)
+    centroid = numpy.zeros(count, numpy.float32)
+    window = numpy.hanning(size).astype(numpy.float32)
+    frequencies = numpy.fft.rfftfreq(size, 1/rate).astype(numpy.float32)
+    previous = None
+
+    for start in range(0, count, chunk):
+        windows = min(chunk, count-start)
+        block = to_mono(samples[start*hop:(start+windows-1)*hop+size])
+        frames = numpy.lib.stride_tricks.sliding_window_view(block, size)[::hop]*window
+        spectrum = numpy.log1p(numpy.abs(numpy.fft.rfft(frames, axis=1))).astype(numpy.float32)
+
+        # flux is how much the spectrum grew since the window before
+        if previous is None:
+            previous = spectrum[:1]
+        change = numpy.diff(spectrum, axis=0, prepend=previous)
+        flux[start:start+windows] = numpy.maximum(change, 0).sum(axis=1)
+        loudness[start:start+windows] = numpy.sqrt((frames**2).mean(axis=1))
+        centroid[start:start+windows] = (spectrum*frequencies).sum(axis=1)/(spectrum.sum(axis=1)+1e-9)
+        previous = spectrum[-1:]
+
+    return {"flux":flux, "loudness":loudness, "centroid":centroid, "rate":rate/hop, "offset":size/2/rate}
+
+def smooth(values, width):
+    '''smooth(values, width) -> array
+    returns the moving average of values over width values'''
+    width = max(int(width), 1)
+    return numpy.convolve(values, numpy.ones(width, numpy.float32)/width, mode="same")
+
+def find_beats(flux, frameRate, slowest=60, fastest=180):
+    '''find_beats(flux, frameRate, slowest=60, fastest=180) -> array
+    returns the frame of every beat
+    the tempo is the autocorrelation peak of the onset envelope
+    between slowest and fastest beats per minute'''
+    if len(flux) < 2:
+        return numpy.zeros(0, int)
+
+    # a longer kernel would make convolve return more values than flux
+    envelope = numpy.maximum(flux-smooth(flux, min(frameRate/2, len(flux))), 0)
+
+    # autocorrelation through the fft
+    spectrum = numpy.fft.rfft(envelope, 2*len(envelope))
+    correlation = numpy.fft.irfft(spectrum*numpy.conj(spectrum))[:len(envelope)]
+    shortest = max(int(frameRate*60/fastest), 1)
+    longest = min(int(frameRate*60/slowest), len(envelope)-1)
+    if longest <= shortest:
+        return numpy.zeros(0, int)
+    period = shortest+int(numpy.argmax(correlation[shortest:longest]))
+
+    # the phase that lands on the most onsets
+    padded = numpy.pad(envelope, (0, -len(envelope)%period))
+    beat = int(numpy.argmax(padded.reshape(-1, period).sum(axis=0)))
+
+    # follow the beat, moving each one to the strongest onset near it
+    reach = max(period//8, 1)
+    beats = []
+    while beat < len(envelope):
+        start = max(beat-reach, 0)
+        beat = start+int(numpy.argmax(envelope[start:beat+reach+1]))
+        beats.append(beat)
+        beat += period
+    return numpy.array(beats, int)
+
+def make_show(file, tubes=5, quietest=0.2):
+    '''make_show(file, tubes=5, quietest=0.2) -> list
+    returns the launches for the track in file, as
+    {"at": seconds, "tube": tube, "color": color, "length": length}
+    beats quieter than quietest (0 to 1) are skipped. a beat goes to the
+    tube its brightness picks, or the nearest tube that is free by then.
+    beats when every tube is busy are skipped'''
+    samples, rate = read_wave(file)
+    features = analyse(samples, rate)
+    beats = find_beats(features["flux"], features["rate"])
+    if len(beats) == 0:
+        return []
+
+    # loudness picks the color and height, brightness picks the tube
+    strength = features["loudness"][beats]
+    strength = numpy.clip(strength/(numpy.percentile(strength, 95)+1e-9), 0, 1)
+    centroid = features["centroid"][beats]
+    low, high = numpy.percentile(centroid, (5, 95))
+    brightness = numpy.clip((centroid-low)/(high-low+1e-9), 0, 1)
+
+    launches = []
+    free = [-BUSY]*tubes
+    times = beats/features["rate"]+features["offset"]
+    for at, power, bright in zip(times, strength, brightness):
+        if power < quietest:
+            continue
+        at = round(float(at), 3)
+        wanted = min(int(bright*tubes), tubes-1)
+        ready = [tube for tube in range(tubes) if free[tube] <= at-ASCENT]
+        if len(ready) == 0:
+            continue
+        tube = min(ready, key=lambda tube: abs(tube-wanted))
+        free[tube] = at-ASCENT+BUSY
+        launches.append({"at":at, "tube":tube,
+            "color":PALETTE[min(int(power*len(PALETTE)), len(PALETTE)-1)], "length":int(250+200*power)})
+    return launches
+
+class MusicFireworks(fw.Fireworks):
+    '''represents fireworks launched in time with a track'''
+
+    def __init__(self, file, launches, **options):
+        '''MusicFireworks(file, launches, **options) -> MusicFireworks
+        constructs the fireworks for the track in file
+        launches is from make_show, options go to Fireworks'''
+        self.music = file
+        self.launches = launches
+        fw.Fireworks.__init__(self, remake=functools.partial(MusicFireworks.__init__, self, file, launches, **options),
+            **options)
+
+    def setup(self):
+        '''MusicFireworks.setup() -> None
+        sets up the fireworks and starts the track'''
+        self.next = 0
+        fw.Fireworks.setup(self)
+        pygame.mixer.music.load(self.music)
+        pygame.mixer.music.play()
+
+    def update(self):
+        '''MusicFireworks.update() -> None
+        launches rockets so they burst on their beat'''
+        now = pygame.mixer.music.get_pos()/1000
+        while self.next < len(self.launches) and self.launches[self.next]["at"]-ASCENT <= now:
+            launch = self.launches[self.next]
+            self.launch_tube(launch["tube"], launch["color"], launch["length"])
+            self.next += 1
+
+        fw.Fireworks.update(self)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fireworks in time with a WAV file")
+    parser.add_argument("file", help="WAV file to play")
+    parser.add_argument("--save", help="save the launches to this JSON file")
+    parser.add_argument("--analyse-only", action="store_true", help="do not play the show")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    launches = make_show(args.file)
+    print(f"{len(launches)} launches found in {time.perf_counter()-start:.2f} seconds")
+    if args.save != None:
+        with open(args.save, "w") as file:
+            json.dump(launches, file, indent=1)
+
+    if not args.analyse_only:
+        pygame.init()
+        MusicFireworks(args.file, launches).mainloop()
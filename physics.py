@@ -0,0 +1,422 @@
+# Name: Fireworks Physics
+# Author: G.G.Otto
+# Date: 10/19/2026
+# Version: 1.0
+#
+# Moves every particle at once with NumPy.
+# Particles live in preallocated arrays and are stepped together
+# with a semi-implicit Euler integrator through gravity, wind and
+# quadratic air drag. Emitters add short lived sparks and smoke to
+# the same arrays, recycling the slots of the ones that burnt out.
+#
+# run this file to benchmark 10000 particles
+
+import numpy, random, math, time, heapq
+
+class Environment:
+    '''represents the air the particles fly through'''
+
+    def __init__(self, gravity=353.16, wind=(0,0), gust=0, drag=0, spread=0):
+        '''Environment(gravity=353.16, wind=(0,0), gust=0, drag=0, spread=0) -> Environment
+        constructs the environment
+        gravity is in pixels/s/s downwards, wind is in pixels/s
+        gust is how much the wind changes with height and time
+        drag is the quadratic drag coefficient (per pixel)
+        spread is how much gravity can change between bursts (0 to 1)'''
+        self.gravity = 0
+        self.wind = (0,0)
+        self.gust = 0
+        self.drag = 0
+        self.spread = 0
+        self.configure(gravity=gravity, wind=wind, gust=gust, drag=drag, spread=spread)
+
+    def configure(self, **settings):
+        '''Environment.configure(**settings) -> None
+        changes the settings given (see Environment)
+        raises ValueError and changes nothing if a setting is bad'''
+        checked = {}
+        for key, value in settings.items():
+            if key not in ("gravity", "wind", "gust", "drag", "spread"):
+                raise ValueError(f"{key} is not an environment setting")
+            if key == "wind":
+                if not isinstance(value, (list, tuple)) or len(value) != 2:
+                    raise ValueError("wind must be two numbers")
+                value = float(value[0]), float(value[1])
+            else:
+                value = float(value)
+            if not all(map(math.isfinite, value if key == "wind" else (value,))):
+                raise ValueError(f"{key} must be finite")
+            if key == "drag" and value < 0:
+                raise ValueError("drag must not be negative")
+            if key == "spread" and not 0 <= value <= 1:
+                raise ValueError("spread must be between 0 and 1")
+            checked[key] = value
+
+        for key, value in checked.items():
+            setattr(self, key, value)
+
+    def burst_gravity(self):
+        '''Environment.burst_gravity() -> float
+        returns the gravity for a new burst'''
+        return self.gravity*(1+random.uniform(-self.spread, self.spread))
+
+    def wind_at(self, pos, time):
+        '''Environment.wind_at(pos, time) -> array
+        returns the wind at every position in pos (an n by 2 array)
+        gusts are waves of sideways wind rolling down the sky'''
+        wind = numpy.empty_like(pos)
+        wind[:,0] = self.wind[0]
+        wind[:,1] = self.wind[1]
+        if self.gust != 0:
+            wind[:,0] += self.gust*numpy.sin(pos[:,1]/80+time*1.3)
+        return wind
+
+class ParticleStore:
+    '''represents the position and velocity of every particle
+    in preallocated arrays. free slots are recycled lowest first
+    so the stepped part of the arrays stays small.
+    particles with a life are emitted: they are drawn with a color
+    ramp and die on their own, the others live until killed'''
+
+    # arrays with one value for every slot
+    fields = ("pos", "vel", "gravity", "alive", "age", "life", "ramp")
+
+    def __init__(self, environment, capacity=1024):
+        '''ParticleStore(environment, capacity=1024) -> ParticleStore
+        constructs the store with room for capacity particles'''
+        self.environment = environment
+        self.pos = numpy.zeros((capacity,2))
+        self.vel = numpy.zeros((capacity,2))
+        self.gravity = numpy.zeros(capacity)
+        self.alive = numpy.zeros(capacity, bool)
+        self.age = numpy.zeros(capacity)
+        self.life = numpy.zeros(capacity)
+        self.ramp = numpy.full(capacity, -1)
+        self.free = list(range(capacity))
+        self.top = 0
+        self.time = 0
+        self.requests = []
+        self.colors = []
+        self.ramps = numpy.zeros((0,3), int)
+        self.rampIDs = {}
+
+    def get_environment(self):
+        '''ParticleStore.get_environment() -> Environment
+        returns the environment'''
+        return self.environment
+
+    def get_count(self):
+        '''ParticleStore.get_count() -> int
+        returns the number of live particles'''
+        return len(self.alive)-len(self.free)
+
+    def get_capacity(self):
+        '''ParticleStore.get_capacity() -> int
+        returns the number of slots in the store'''
+        return len(self.alive)
+
+    def grow(self, needed=1):
+        '''ParticleStore.grow(needed=1) -> None
+        doubles the room in the store until needed slots are free'''
+        capacity = len(self.alive)
+        while capacity-len(self.alive)+len(self.free) < needed:
+            capacity *= 2
+        added = capacity-len(self.alive)
+        for field in self.fields:
+            array = getattr(self, field)
+            extra = numpy.zeros((added,)+array.shape[1:], array.dtype)
+            if field == "ramp":
+                extra[:] = -1
+            setattr(self, field, numpy.concatenate((array, extra)))
+        for slot in range(capacity-added, capacity):
+            heapq.heappush(self.free, slot)
+
+    def add_ramp(self, colors, size=1, steps=16):
+        '''ParticleStore.add_ramp(colors, size=1, steps=16) -> int
+        returns the ID of the ramp through colors (rgb tuples) over
+        the life of an emitted particle drawn size pixels big'''
+        key = tuple(map(tuple, colors)), size, steps
+        if key not in self.rampIDs:
+            stops = numpy.linspace(0, 1, len(colors))
+            shades = numpy.linspace(0, 1, steps)
+            ramp = numpy.column_stack([numpy.interp(shades, stops, [color[i] for color in colors]) for i in range(3)])
+
+            # every ramp is (first color, steps, size)
+            self.rampIDs[key] = len(self.ramps)
+            self.ramps = numpy.vstack((self.ramps, (len(self.colors), steps, size)))
+            self.colors.extend(tuple(color) for color in ramp.round().astype(int).tolist())
+        return self.rampIDs[key]
+
+    def spawn(self, pos, vel, gravity):
+        '''ParticleStore.spawn(pos, vel, gravity) -> int
+        adds a particle and returns its slot'''
+        if len(self.free) == 0:
+            self.grow()
+        slot = heapq.heappop(self.free)
+        self.pos[slot] = pos
+        self.vel[slot] = vel
+        self.gravity[slot] = gravity
+        self.alive[slot] = True
+        self.age[slot] = 0
+        self.life[slot] = 0
+        self.ramp[slot] = -1
+        self.top = max(self.top, slot+1)
+        return slot
+
+    def request(self, count, pos, drift, emitter):
+        '''ParticleStore.request(count, pos, drift, emitter) -> None
+        asks for count particles from emitter at pos, moving with drift
+        they are all made at once at the start of the next step'''
+        gravity = emitter.gravity
+        if gravity == None:
+            gravity = self.environment.gravity
+        self.requests.append((count, pos[0], pos[1], drift[0], drift[1], emitter.heading, emitter.spread,
+            emitter.speed, gravity, emitter.lifetime, emitter.ramp))
+
+    def flush(self):
+        '''ParticleStore.flush() -> None
+        makes the particles of every request'''
+        if len(self.requests) == 0:
+            return
+        requests = numpy.array(self.requests)
+        self.requests.clear()
+        counts = requests[:,0].astype(int)
+        total = int(counts.sum())
+
+        x, y, dx, dy, heading, spread, speed, gravity, lifetime, ramp = numpy.repeat(requests[:,1:], counts, 0).T
+        heading += spread*numpy.random.uniform(-1, 1, total)
+        speed *= numpy.random.uniform(0.5, 1, total)
+        vel = numpy.column_stack((dx+speed*numpy.cos(heading), dy-speed*numpy.sin(heading)))
+        life = lifetime*numpy.random.uniform(0.75, 1.25, total)
+        self.emit(total, numpy.column_stack((x, y)), vel, gravity, life, ramp)
+
+    def emit(self, count, pos, vel, gravity, life, ramp):
+        '''ParticleStore.emit(count, pos, vel, gravity, life, ramp) -> None
+        adds count particles that die after life seconds
+        the rest are values or arrays with a value for each particle
+        ramp is the ID from ParticleStore.add_ramp'''
+        if count <= 0:
+            return
+        if len(self.free) < count:
+            self.grow(count)
+        slots = numpy.array([heapq.heappop(self.free) for i in range(count)])
+        self.pos[slots] = pos
+        self.vel[slots] = vel
+        self.gravity[slots] = gravity
+        self.alive[slots] = True
+        self.age[slots] = 0
+        self.life[slots] = life
+        self.ramp[slots] = ramp
+        self.top = max(self.top, int(slots[-1])+1)
+
+    def kill(self, slot):
+        '''ParticleStore.kill(slot) -> None
+        removes the particle in slot'''
+        if not self.alive[slot]:
+            return
+        self.alive[slot] = False
+        self.vel[slot] = 0
+        self.gravity[slot] = 0
+        heapq.heappush(self.free, slot)
+        while self.top > 0 and not self.alive[self.top-1]:
+            self.top -= 1
+
+    def clear(self):
+        '''ParticleStore.clear() -> None
+        removes every particle'''
+        self.alive[:] = False
+        self.vel[:] = 0
+        self.gravity[:] = 0
+        self.life[:] = 0
+        self.ramp[:] = -1
+        self.free = list(range(len(self.alive)))
+        self.top = 0
+        self.requests.clear()
+
+    def get_pos(self, slot):
+        '''ParticleStore.get_pos(slot) -> [x, y]
+        returns the position of the particle in slot'''
+        return self.pos[slot].tolist()
+
+    def get_live(self):
+        '''ParticleStore.get_live() -> (slots, pos, vel, gravity, age, life, ramp)
+        returns copies of the arrays of every live particle'''
+        slots = numpy.flatnonzero(self.alive[:self.top])
+        return (slots, self.pos[slots], self.vel[slots], self.gravity[slots], self.age[slots],
+            self.life[slots], self.ramp[slots])
+
+    def set_live(self, slots, pos, vel, gravity, age, life, ramp):
+        '''ParticleStore.set_live(slots, pos, vel, gravity, age, life, ramp) -> None
+        replaces every particle with the ones from ParticleStore.get_live()'''
+        if len(ramp) > 0 and ramp.max() >= len(self.ramps):
+            raise ValueError("particles use color ramps that are not in the store")
+        self.clear()
+        if len(slots) == 0:
+            return
+        top = int(slots.max())+1
+        if top > len(self.alive):
+            self.grow(top)
+        self.pos[slots] = pos
+        self.vel[slots] = vel
+        self.gravity[slots] = gravity
+        self.age[slots] = age
+        self.life[slots] = life
+        self.ramp[slots] = ramp
+        self.alive[slots] = True
+        self.free = numpy.flatnonzero(~self.alive).tolist()
+        self.top = top
+
+    def get_state(self, slot):
+        '''ParticleStore.get_state(slot) -> (pos, vel, gravity)
+        returns the state of the particle in slot'''
+        return tuple(self.pos[slot].tolist()), tuple(self.vel[slot].tolist()), float(self.gravity[slot])
+
+    def step(self, seconds):
+        '''ParticleStore.step(seconds) -> None
+        moves every particle forward by seconds'''
+        self.flush()
+        top = self.top
+        pos = self.pos[:top]
+        vel = self.vel[:top]
+        environment = self.environment
+
+        # drag is against the velocity relative to the wind
+        # it is integrated implicitly so strong drag never overshoots
+        if environment.drag != 0:
+            relative = vel-environment.wind_at(pos, self.time)
+            speed = numpy.hypot(relative[:,0], relative[:,1])
+            factor = environment.drag*seconds*speed*self.alive[:top]
+            relative *= (factor/(1+factor))[:,None]
+            vel -= relative
+        vel[:,1] += self.gravity[:top]*seconds
+        pos += vel*seconds
+
+        self.time += seconds
+
+        # emitted particles burn out
+        age = self.age[:top]
+        age += seconds
+        life = self.life[:top]
+        burnt = numpy.flatnonzero(self.alive[:top] & (life > 0) & (age >= life))
+        if len(burnt) > 0:
+            self.alive[burnt] = False
+            self.life[burnt] = 0
+            self.ramp[burnt] = -1
+            for slot in burnt.tolist():
+                heapq.heappush(self.free, slot)
+            live = numpy.flatnonzero(self.alive[:top])
+            self.top = int(live[-1])+1 if len(live) > 0 else 0
+
+    def get_emitted(self):
+        '''ParticleStore.get_emitted() -> list
+        returns (pos, color, size) for every emitted particle'''
+        top = self.top
+        slots = numpy.flatnonzero(self.alive[:top] & (self.ramp[:top] >= 0))
+        if len(slots) == 0:
+            return []
+        first, steps, size = self.ramps[self.ramp[slots]].T
+        shades = numpy.minimum(self.age[slots]/self.life[slots], 1)
+        colors = self.colors
+        return list(zip(self.pos[slots].tolist(), [colors[color] for color in
+            (first+(shades*(steps-1)).astype(int)).tolist()], size.tolist()))
+
+class Emitter:
+    '''represents a source of sparks or smoke feeding a ParticleStore
+    particles leave at rate a second at heading (radians) give or take
+    spread, live for lifetime seconds give or take a quarter and go
+    through the colors of the ramp as they age'''
+
+    def __init__(self, store, rate, lifetime, spread, colors, heading=-math.pi/2, speed=60,
+        gravity=None, size=1):
+        '''Emitter(store, rate, lifetime, spread, colors, heading=-pi/2, speed=60, gravity=None, size=1) -> Emitter
+        constructs an emitter for store, pointing down by default
+        gravity is in pixels/s/s, the environment's gravity if None'''
+        self.store = store
+        self.rate = rate
+        self.lifetime = lifetime
+        self.spread = spread
+        self.heading = heading
+        self.speed = speed
+        self.gravity = gravity
+        self.ramp = store.add_ramp(colors, size)
+        self.owed = 0
+        self.active = False
+        self.remaining = None
+
+    def start(self, duration=None):
+        '''Emitter.start(duration=None) -> None
+        starts emitting, for duration seconds if given'''
+        self.active = True
+        self.remaining = duration
+
+    def stop(self):
+        '''Emitter.stop() -> None
+        stops emitting'''
+        self.active = False
+        self.owed = 0
+
+    def is_active(self):
+        '''Emitter.is_active() -> bool
+        returns whether the emitter is emitting'''
+        return self.active
+
+    def get_state(self):
+        '''Emitter.get_state() -> (active, remaining, owed)
+        returns what the emitter is doing, remaining is None if it has no end'''
+        return self.active, self.remaining, self.owed
+
+    def set_state(self, state):
+        '''Emitter.set_state(state) -> None
+        sets the emitter to state from Emitter.get_state()'''
+        self.active, self.remaining, self.owed = state
+
+    def step(self, seconds, pos, drift=(0,0)):
+        '''Emitter.step(seconds, pos, drift=(0,0)) -> None
+        emits the particles due in seconds at pos
+        drift is the velocity of the source added to every particle'''
+        if not self.active:
+            return
+        if self.remaining != None:
+            self.remaining -= seconds
+            if self.remaining <= 0:
+                self.stop()
+                return
+        self.owed += self.rate*seconds
+        count = int(self.owed)
+        self.owed -= count
+        self.burst(count, pos, drift)
+
+    def burst(self, count, pos, drift=(0,0)):
+        '''Emitter.burst(count, pos, drift=(0,0)) -> None
+        emits count particles at pos, with the next step of the store'''
+        if count > 0:
+            self.store.request(count, pos, drift, self)
+
+def velocity(power, heading):
+    '''velocity(power, heading) -> (vx, vy)
+    returns the velocity in pixels/s of a particle thrown
+    with power (pixels/s) at heading (radians, 0 is right, up is positive)'''
+    return power*math.cos(heading), -power*math.sin(heading)
+
+def benchmark(count=10000, steps=600, budget=16):
+    '''benchmark(count=10000, steps=600, budget=16) -> float
+    steps count particles through wind and drag at 60 steps a second
+    prints and returns the slowest step in milliseconds'''
+    store = ParticleStore(Environment(wind=(40,0), gust=30, drag=0.002, spread=0.2), count)
+    for i in range(count):
+        store.spawn((300,200), velocity(random.uniform(100,160), random.uniform(0,2*math.pi)),
+            store.get_environment().burst_gravity())
+
+    times = []
+    for i in range(steps):
+        start = time.perf_counter()
+        store.step(1/60)
+        times.append((time.perf_counter()-start)*1000)
+
+    times.sort()
+    print(f"{count} particles, {steps} steps: mean {sum(times)/steps:.3f} ms, "
+        f"99% {times[int(steps*0.99)-1]:.3f} ms, slowest {times[-1]:.3f} ms (budget {budget} ms)")
+    return times[-1]
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,221 @@
+# Name: Sharded Fireworks Show
+# Author: G.G.Otto
+# Date: 10/19/2026
+# Version: 1.0
+#
+# Runs one fireworks show across several windows on one host.
+# The sky is cut into side by side shards and each shard is
+# drawn by its own process with its own Game loop. All shards
+# follow one shared show clock, and particles that fly out of
+# one shard are handed off to the shard next to it.
+#
+# usage: python shardshow.py [shards] [width]
+
+import pygame, multiprocessing, heapq, queue, time, os, sys, functools
+import fireworks as fw
+from pygame.locals import *
+
+COLORS = ["red", "green", "blue", "pink", "yellow"]
+
+class ShardFireworks(fw.Fireworks):
+    '''represents the part of the sky drawn by one shard worker'''
+
+    def __init__(self, shard, width, start, inbox, outbox, neighbors):
+        '''ShardFireworks(shard, width, start, inbox, outbox, neighbors) -> ShardFireworks
+        constructs the fireworks for shard number shard
+        start is the shared show start time (time.monotonic)
+        neighbors is the (left, right) shard inboxes (None at the edges)'''
+        self.shard = shard
+        self.left = shard*width
+        self.width = width
+        self.start = start
+        self.inbox = inbox
+        self.outbox = outbox
+        self.neighbors = neighbors
+
+        # one tube every 100 pixels, colored by its place in the whole sky
+        tubes = []
+        for x in range(100, width, 100):
+            tubes.append((COLORS[(self.left+x)//100 % len(COLORS)], x))
+        fw.Fireworks.__init__(self, (width, 625), tubes, remake=functools.partial(ShardFireworks.__init__,
+            self, shard, width, start, inbox, outbox, neighbors))
+        self.set_caption(f"Fireworks - shard {shard}")
+
+    def setup(self):
+        '''ShardFireworks.setup() -> None
+        sets up the shard with no launches scheduled'''
+        self.launches = []
+        self.visitors = []
+        fw.Fireworks.setup(self)
+
+    def get_show_time(self):
+        '''ShardFireworks.get_show_time() -> float
+        returns the time on the shared show clock'''
+        return time.monotonic()-self.start.value
+
+    def launch_all(self, event=None):
+        '''ShardFireworks.launch_all() -> None
+        asks the coordinator for a finale on every shard'''
+        if event == None or event.key == K_SPACE:
+            self.outbox.put(("finale",))
+
+    def launch_at(self, showTime, x=None):
+        '''ShardFireworks.launch_at(showTime, x=None) -> None
+        launches the rocket at global x at showTime
+        launches every rocket in the shard if x is None'''
+        heapq.heappush(self.launches, (showTime, -1 if x == None else x-self.left))
+
+    def receive(self, particle):
+        '''ShardFireworks.receive(particle) -> None
+        takes over a particle handed off from a neighbor'''
+        startTime, color, motion = particle
+        elapsed = self.get_show_time()-startTime
+        if elapsed >= 1.5:
+            return
+
+        pos = motion[0][0]-self.left, motion[0][1]
+        visitor = fw.Particle(self, color, pos)
+        visitor.resume((pos,)+tuple(motion[1:]), elapsed)
+        self.visitors.append(visitor)
+        self.add_particle(visitor)
+
+    def hand_off(self, particle):
+        '''ShardFireworks.hand_off(particle) -> None
+        sends particle to the neighbor it is flying into'''
+        neighbor = self.neighbors[particle.pos[0] >= self.width]
+        pos, vel, gravity = particle.get_motion()
+        startTime = self.get_show_time()-particle.moveClock.get_time()
+        particle.stop()
+        if neighbor != None:
+            neighbor.put(("particle", (startTime, particle.color, ((pos[0]+self.left, pos[1]), vel, gravity))))
+
+    def process_messages(self):
+        '''ShardFireworks.process_messages() -> None
+        handles every message waiting in the inbox'''
+        while True:
+            try:
+                message = self.inbox.get_nowait()
+            except queue.Empty:
+                return
+
+            if message[0] == "launch":
+                self.launch_at(*message[1:])
+            elif message[0] == "particle":
+                self.receive(message[1])
+            elif message[0] == "quit":
+                self.close()
+
+    def update(self):
+        '''ShardFireworks.update() -> None
+        updates the shard'''
+        self.process_messages()
+
+        # scheduled launches
+        now = self.get_show_time()
+        while len(self.launches) > 0 and self.launches[0][0] <= now:
+            x = heapq.heappop(self.launches)[1]
+            for rocket in self.rockets[:]:
+                if x == -1 or rocket.originPos[0] == x:
+                    rocket.launch()
+
+        # particles leaving the shard
+        for layer in self.layers.values():
+            for particle in layer:
+                if particle.moving and not 0 <= particle.pos[0] < self.width:
+                    self.hand_off(particle)
+
+        # finished visitors
+        for visitor in self.visitors[:]:
+            if not visitor.moving:
+                self.visitors.remove(visitor)
+                self.particles.remove(visitor)
+
+        fw.Fireworks.update(self)
+
+def run_shard(shard, width, start, inbox, outbox, neighbors):
+    '''run_shard(shard, width, start, inbox, outbox, neighbors) -> None
+    runs one shard worker. used as a process target'''
+    os.environ["SDL_VIDEO_WINDOW_POS"] = f"{shard*width},0"
+    pygame.init()
+    ShardFireworks(shard, width, start, inbox, outbox, neighbors).mainloop()
+    outbox.put(("closed", shard))
+
+class ShowCoordinator:
+    '''starts the shard workers and shares the show clock and launches'''
+
+    def __init__(self, shards=3, width=600, lead=0.5):
+        '''ShowCoordinator(shards=3, width=600, lead=0.5) -> ShowCoordinator
+        constructs a show of shards windows each width pixels wide
+        lead is the delay in seconds given to launches so every shard gets them in time'''
+        self.context = multiprocessing.get_context("spawn")
+        self.shards = shards
+        self.width = width
+        self.lead = lead
+        self.start = self.context.Value("d", 0, lock=False)
+        self.outbox = self.context.Queue()
+        self.inboxes = [self.context.Queue() for i in range(shards)]
+        self.workers = []
+
+    def get_time(self):
+        '''ShowCoordinator.get_time() -> float
+        returns the time on the show clock'''
+        return time.monotonic()-self.start.value
+
+    def launch(self, showTime, x=None):
+        '''ShowCoordinator.launch(showTime, x=None) -> None
+        launches the rocket at global x at showTime
+        launches every rocket if x is None'''
+        if x == None:
+            for inbox in self.inboxes:
+                inbox.put(("launch", showTime))
+        elif 0 <= x < self.shards*self.width:
+            self.inboxes[int(x//self.width)].put(("launch", showTime, x))
+
+    def finale(self):
+        '''ShowCoordinator.finale() -> None
+        launches every rocket on every shard at once'''
+        self.launch(self.get_time()+self.lead)
+
+    def stop(self):
+        '''ShowCoordinator.stop() -> None
+        closes every shard'''
+        for inbox in self.inboxes:
+            inbox.put(("quit",))
+
+    def run(self):
+        '''ShowCoordinator.run() -> None
+        starts the shards and coordinates them until they close'''
+        self.start.value = time.monotonic()+self.lead
+        for shard in range(self.shards):
+            neighbors = (self.inboxes[shard-1] if shard > 0 else None,
+                self.inboxes[shard+1] if shard < self.shards-1 else None)
+            worker = self.context.Process(target=run_shard, args=(shard, self.width,
+                self.start, self.inboxes[shard], self.outbox, neighbors))
+            worker.start()
+            self.workers.append(worker)
+
+        # closing one window, or one shard dying, closes the show
+        # shards are checked every time, busy shards must not hide a dead one
+        running = set(range(self.shards))
+        while len(running) > 0:
+            for shard in list(running):
+                if not self.workers[shard].is_alive():
+                    running.discard(shard)
+                    self.stop()
+            try:
+                message = self.outbox.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            if message[0] == "finale":
+                self.finale()
+            elif message[0] == "closed":
+                running.discard(message[1])
+                self.stop()
+
+        for worker in self.workers:
+            worker.join()
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    ShowCoordinator(*args).run()